@@ -1,8 +1,10 @@
 import numpy as np
-import random
 from dataclasses import dataclass
 import config
 
+# Codes de type des tableaux de l'environnement (anomaly_kind) : types dont le rayon évolue, 0 pour les autres
+ANOMALY_KIND_CODES = {'radiation': 1, 'inondations': 2}
+
 @dataclass
 class Anomaly:
     """Représente une anomalie dans l'environnement."""
@@ -56,7 +58,7 @@ class Anomaly:
         
         - Snowball: anomalie faible peut devenir intense
         - Spread: anomalie intense peut propager sur cases adjacentes
-        - Comportement spécifique selon le type
+        - Comportement spécifique selon le type (rayon, voir evolve_radii)
         
         Args:
             step: Numéro du tour actuel
@@ -65,17 +67,26 @@ class Anomaly:
         if self.treated:
             return  # Anomalie déjà traitée, pas d'évolution
         
+        self._evolve_random_events(environment)
+        
+        # Comportement spécifique au type d'anomalie (anomalies faibles uniquement)
+        if self.intensity != 2 and self.is_radius_step(step):
+            self.evolve_radii(environment, step, [environment.index_of(self)])
+    
+    def _evolve_random_events(self, environment):
+        """Tirages aléatoires de evolve : snowball puis spread."""
         # SNOWBALL : Anomalie faible → intense
+        # (pas de tirage aléatoire si la probabilité est nulle, idem pour SPREAD)
         if self.intensity == 1:  # Si faible
-            if np.random.random() < config.ANOMALY_SNOWBALL_CHANCE:
+            if config.ANOMALY_SNOWBALL_CHANCE > 0 and environment.rng.random() < config.ANOMALY_SNOWBALL_CHANCE:
                 # Passe de faible à intense
                 old_intensity = self.intensity
-                self.intensity = 2  # Devient intense
+                environment.mark_intense(self)  # Devient intense
                 # print(f"[SNOWBALL] Anomalie {self.type} à ({self.x:.1f}, {self.y:.1f}) : {old_intensity} → {self.intensity} (INTENSE)")
         
         # SPREAD : Anomalie intense propage sur cases adjacentes
         if self.intensity == 2:  # Si intense
-            if np.random.random() < config.ANOMALY_SPREAD_CHANCE:
+            if config.ANOMALY_SPREAD_CHANCE > 0 and environment.rng.random() < config.ANOMALY_SPREAD_CHANCE:
                 # Tenter de propager sur une case adjacente aléatoire
                 # Chercher les cases voisines disponibles
                 available_neighbors = []
@@ -113,7 +124,7 @@ class Anomaly:
                 
                 # Si au moins une case voisine est disponible, propager
                 if available_neighbors:
-                    new_x, new_y = random.choice(available_neighbors)
+                    new_x, new_y = available_neighbors[environment.rng.integers(len(available_neighbors))]
                     # Créer nouvelle anomalie FAIBLE
                     new_anomaly = Anomaly(
                         x=float(new_x),
@@ -123,28 +134,95 @@ class Anomaly:
                         type=self.type,
                         treated=False
                     )
-                    environment.anomalies.append(new_anomaly)
+                    environment.add_anomaly(new_anomaly)
                     # print(f"[SPREAD] Anomalie {self.type} propagée à ({new_x}, {new_y}) intensité {new_anomaly.intensity}")
+    
+    @staticmethod
+    def is_radius_step(step):
+        """
+        Retourne True si le rayon d'une anomalie peut changer à ce tour (calendrier de evolve) :
+        radiation tous les 20 tours, inondations tous les 15 tours (< 100) puis tous les 25 tours.
+        """
+        if step % 20 == 0:
+            return True
+        return step % 15 == 0 if step < 100 else step % 25 == 0
+    
+    @staticmethod
+    def evolve_radii(environment, step, indices):
+        """
+        Évolution du rayon selon le type, appliquée en bloc sur les tableaux de l'environnement
+        puis recopiée dans les anomalies concernées.
         
-        # Comportement spécifique au type d'anomalie
-        # Note: avec intensité 1 ou 2, pas de variation continue
-        # Les variations se font via snowball (1→2) uniquement
-            
-        elif self.type == 'radiation':
-            # Radiation : se propage lentement (rayon augmente)
-            if step % 20 == 0:  # Tous les 20 pas de temps
-                self.radius = min(self.radius + 0.2, 20)  # Max 20
-                
-        elif self.type == 'inondations':
-            # Inondations : s'étend puis se résorbe
-            if step < 100:
-                # Phase d'expansion
-                if step % 15 == 0:
-                    self.radius = min(self.radius + 0.5, 18)
-            else:
-                # Phase de résorption
-                if step % 25 == 0:
-                    self.radius = max(5, self.radius - 0.3)
+        - Radiation : se propage lentement (rayon +0.2 tous les 20 tours, max 20)
+        - Inondations : s'étend (+0.5 tous les 15 tours, max 18) avant le tour 100,
+          puis se résorbe (-0.3 tous les 25 tours, min 5)
+        
+        Args:
+            environment: Environnement contenant les anomalies
+            step: Numéro du tour actuel
+            indices: Indices (dans environment.anomalies) des anomalies faibles non traitées
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        kinds = environment.anomaly_kind[indices]
+        radii = environment.anomaly_radius[indices]
+        changed = np.zeros(indices.size, dtype=bool)
+        
+        if step % 20 == 0:
+            radiation = kinds == ANOMALY_KIND_CODES['radiation']
+            radii[radiation] = np.minimum(radii[radiation] + 0.2, 20)
+            changed |= radiation
+        
+        floods = kinds == ANOMALY_KIND_CODES['inondations']
+        if step < 100:
+            # Phase d'expansion
+            if step % 15 == 0:
+                radii[floods] = np.minimum(radii[floods] + 0.5, 18)
+                changed |= floods
+        else:
+            # Phase de résorption
+            if step % 25 == 0:
+                radii[floods] = np.maximum(radii[floods] - 0.3, 5)
+                changed |= floods
+        
+        if not changed.any():
+            return
+        
+        changed_indices = indices[changed]
+        environment.anomaly_radius[changed_indices] = radii[changed]
+        anomalies = environment.anomalies
+        for index, radius in zip(changed_indices.tolist(), radii[changed].tolist()):
+            anomalies[index].radius = radius
+        environment.anomaly_revision += 1
+    
+    @classmethod
+    def evolve_all(cls, environment, step):
+        """
+        Fait évoluer toutes les anomalies de l'environnement en un seul appel.
+        
+        Les tirages aléatoires (snowball, spread) restent faits anomalie par anomalie, dans
+        l'ordre de la liste ; les anomalies créées par propagation pendant ce tour évoluent
+        aussi dans ce même tour. L'évolution du rayon, qui ne dépend d'aucun tirage, est
+        ensuite appliquée en une seule fois à toutes les anomalies faibles non traitées.
+        
+        Args:
+            environment: Environnement contenant les anomalies
+            step: Numéro du tour actuel
+        """
+        # Sans snowball ni spread, seule l'évolution du rayon (tours fixes) peut modifier une anomalie
+        has_random_events = config.ANOMALY_SNOWBALL_CHANCE > 0 or config.ANOMALY_SPREAD_CHANCE > 0
+        radius_step = cls.is_radius_step(step)
+        if not has_random_events and not radius_step:
+            return  # Rien ne peut changer à ce tour
+        
+        if has_random_events:
+            for anomaly in environment.anomalies:  # La liste peut grandir pendant le parcours (spread)
+                if not anomaly.treated:
+                    anomaly._evolve_random_events(environment)
+        
+        if radius_step:
+            n = len(environment.anomalies)
+            weak_untreated = ~environment.anomaly_treated[:n] & (environment.anomaly_intensity[:n] != 2)
+            cls.evolve_radii(environment, step, np.flatnonzero(weak_untreated))
     
     def get_intervention_type(self):
         """
@@ -1,4 +1,10 @@
+import sys
 import numpy as np
+from itertools import islice
+
+# Libellés de print_status construits une seule fois
+_INTENSITY_LABELS = ('Faible (1)', 'Intense (2)')  # Indexé par (intensité == 2)
+_RULE = "=" * 60  # Ligne de séparation des sections
 
 class ControlCenter:
     """
@@ -9,30 +15,47 @@ class ControlCenter:
         self.base_y = base_y
         self.global_anomaly_map = {}  # Position -> info anomalie (anomalies actuelles)
         self.detected_anomaly_positions = set()  # Historique de TOUTES les positions détectées (même après traitement)
-        self.global_exploration_map = np.zeros((map_height, map_width))  # Carte d'exploration globale
+        self.global_exploration_map = np.zeros((map_height, map_width), dtype=np.uint8)  # Carte d'exploration globale (0/1)
         self.received_transmissions = []
         self.intervention_zones = []  # Zones nécessitant une intervention
+        self.transmitted_exploration_count = {}  # drone_id -> nombre de cases explorées déjà reçues de ce drone
+        self.anomaly_map_dirty = False  # Vrai si global_anomaly_map a reçu une entrée depuis le dernier nettoyage
+        self._interventions_key = None  # État (anomalies, détections) de la dernière analyse des interventions
         
     def receive_transmission(self, drone):
         """
         Reçoit les données d'un drone.
         Les drones peuvent transmettre depuis n'importe où.
+        
+        Transmission incrémentale : la carte d'exploration personnelle ne fait que grandir
+        (ordre d'insertion conservé), seules les cases ajoutées depuis la dernière
+        transmission de ce drone sont donc envoyées et fusionnées. Elles sont lues depuis la
+        fin du dictionnaire : le coût ne dépend que du nombre de nouvelles cases.
         """
+        exploration_map = drone.personal_exploration_map
+        already_received = self.transmitted_exploration_count.get(drone.id, 0)
+        new_count = len(exploration_map) - already_received
+        new_exploration = list(islice(reversed(exploration_map), new_count))
+        new_exploration.reverse()  # Ordre d'insertion
+        self.transmitted_exploration_count[drone.id] = len(exploration_map)
+        
         transmission = {
             'drone_id': drone.id,
             'position': (drone.x, drone.y),
             'battery': drone.battery,
             'anomalies': drone.detected_anomalies.copy(),
-            'exploration': drone.personal_exploration_map.copy(),
+            'exploration': new_exploration,  # Nouvelles cases explorées depuis la transmission précédente
             'timestamp': len(self.received_transmissions)
         }
         self.received_transmissions.append(transmission)
         
-        # Mise à jour de la carte globale d'EXPLORATION
-        for pos in drone.personal_exploration_map.keys():
-            x, y = int(pos[0]), int(pos[1])
-            if 0 <= x < self.global_exploration_map.shape[1] and 0 <= y < self.global_exploration_map.shape[0]:
-                self.global_exploration_map[y, x] = 1
+        # Mise à jour de la carte globale d'EXPLORATION (écriture groupée des nouvelles cases)
+        if new_exploration:
+            positions = np.array(new_exploration, dtype=int)
+            xs, ys = positions[:, 0], positions[:, 1]
+            height, width = self.global_exploration_map.shape
+            inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+            self.global_exploration_map[ys[inside], xs[inside]] = 1
         
         # Mise à jour de la carte globale des ANOMALIES
         for anomaly in drone.detected_anomalies:
@@ -40,6 +63,7 @@ class ControlCenter:
             key = (int(pos[0]), int(pos[1]))
             if key not in self.global_anomaly_map:
                 self.global_anomaly_map[key] = anomaly
+                self.anomaly_map_dirty = True
             # Enregistrer dans l'historique des détections
             self.detected_anomaly_positions.add(key)
         
@@ -81,7 +105,14 @@ class ControlCenter:
         Analyse les anomalies détectées et détermine les interventions requises.
         Classe par type d'intervention (humaine vs robotique) et urgence.
         Marque aussi les anomalies impossibles à traiter (trop loin, pas assez de batterie).
+        
+        Le résultat précédent est réutilisé si aucune anomalie n'a été ajoutée, traitée ou
+        modifiée et si aucune nouvelle position n'a été détectée depuis la dernière analyse.
         """
+        key = (environment.anomaly_revision, len(self.detected_anomaly_positions))
+        if key == self._interventions_key:
+            return self.intervention_zones
+        self._interventions_key = key
         self.intervention_zones = []
         
         # Pour chaque anomalie détectée, trouver l'anomalie réelle correspondante
@@ -94,7 +125,7 @@ class ControlCenter:
                 detected = True
                 
                 # Vérifier si l'anomalie a été traitée
-                treated_successfully = getattr(anomaly_real, 'treated', False)
+                treated_successfully = anomaly_real.treated
                 treatability = "TREATED" if treated_successfully else "NOT_TREATED"
                 
                 intervention = anomaly_real.get_intervention_type()
@@ -153,53 +184,59 @@ class ControlCenter:
         return summary
     
     def print_status(self, drones):
-        """Affiche l'état du système."""
-        print("\n" + "="*60)
-        print("CENTRE DE CONTRÔLE - ÉTAT DU SYSTÈME")
-        print("="*60)
-        print(f"Position de la base : ({self.base_x}, {self.base_y})")
-        print(f"Nombre de drones actifs : {len(drones)}")
-        print(f"Transmissions reçues : {len(self.received_transmissions)}")
-        print(f"Anomalies détectées : {len(self.global_anomaly_map)}")
-        
-        print("\nÉTAT DES DRONES :")
+        """Affiche l'état du système (rapport construit en entier puis écrit en une seule fois)."""
+        lines = [
+            "\n" + _RULE,
+            "CENTRE DE CONTRÔLE - ÉTAT DU SYSTÈME",
+            _RULE,
+            f"Position de la base : ({self.base_x}, {self.base_y})",
+            f"Nombre de drones actifs : {len(drones)}",
+            f"Transmissions reçues : {len(self.received_transmissions)}",
+            f"Anomalies détectées : {len(self.global_anomaly_map)}",
+            "\nÉTAT DES DRONES :",
+        ]
+        append = lines.append
+        
         for drone in drones:
             status = "BASE" if drone.is_at_base else "MISSION"
             mode = "Traite anomalie" if drone.target_anomaly else "Explore"
             num_anomalies = len(drone.detected_anomalies)
-            print(f"  Drone {drone.id}: {status} | "
-                  f"Pos: ({drone.x:.1f}, {drone.y:.1f}) | "
-                  f"Batterie: {drone.battery:.1f}% | "
-                  f"Mode: {mode} | "
-                  f"Anomalies détectées: {num_anomalies}")
+            append(f"  Drone {drone.id}: {status} | "
+                   f"Pos: ({drone.x:.1f}, {drone.y:.1f}) | "
+                   f"Batterie: {drone.battery:.1f}% | "
+                   f"Mode: {mode} | "
+                   f"Anomalies détectées: {num_anomalies}")
         
         priority_zones = self.get_priority_zones()
         if priority_zones:
-            print(f"\nZONES PRIORITAIRES ({len(priority_zones)}) :")
+            append(f"\nZONES PRIORITAIRES ({len(priority_zones)}) :")
             for i, zone in enumerate(priority_zones[:5]):
-                intensity_str = 'Intense (2)' if zone['intensity'] == 2 else 'Faible (1)'
-                print(f"  {i+1}. Position {zone['position']} | "
-                      f"Intensité: {intensity_str} | "
-                      f"Priorité: {zone['priority']}")
+                intensity_str = _INTENSITY_LABELS[zone['intensity'] == 2]
+                append(f"  {i+1}. Position {zone['position']} | "
+                       f"Intensité: {intensity_str} | "
+                       f"Priorité: {zone['priority']}")
         
         # Affichage des interventions requises
         if self.intervention_zones:
             summary = self.get_intervention_summary()
-            print(f"\n{'='*60}")
-            print("INTERVENTIONS REQUISES")
-            print(f"{'='*60}")
-            print(f"Total: {summary['total']} | Détectées: {summary['detected']} | "
-                  f"Humaines: {summary['human']} | Robotiques: {summary['robot']}")
-            print(f"Urgence - CRITICAL: {summary['critical']} | HIGH: {summary['high']} | "
-                  f"MEDIUM: {summary['medium']} | LOW: {summary['low']}")
+            append("\n" + _RULE)
+            append("INTERVENTIONS REQUISES")
+            append(_RULE)
+            append(f"Total: {summary['total']} | Détectées: {summary['detected']} | "
+                   f"Humaines: {summary['human']} | Robotiques: {summary['robot']}")
+            append(f"Urgence - CRITICAL: {summary['critical']} | HIGH: {summary['high']} | "
+                   f"MEDIUM: {summary['medium']} | LOW: {summary['low']}")
             
-            print("\nDÉTAILS DES INTERVENTIONS PRIORITAIRES :")
+            append("\nDÉTAILS DES INTERVENTIONS PRIORITAIRES :")
             for i, zone in enumerate(self.intervention_zones[:5]):
                 status = "[DETECTE]" if zone['detected'] else "[NON DETECTE]"
-                intensity_str = 'Intense (2)' if zone['intensity'] == 2 else 'Faible (1)'
-                print(f"\n  [{i+1}] {status} - {zone['type'].upper().replace('_', ' ')}")
-                print(f"      Position: ({zone['position'][0]:.1f}, {zone['position'][1]:.1f}) | "
-                      f"Intensité: {intensity_str} | Rayon: {zone['radius']:.1f}m")
-                print(f"      Intervention: {zone['intervention_type']} | Urgence: {zone['urgency']}")
-                print(f"      Action: {zone['description']}")
-                print(f"      Équipement: {', '.join(zone['equipment'])}")
+                intensity_str = _INTENSITY_LABELS[zone['intensity'] == 2]
+                append(f"\n  [{i+1}] {status} - {zone['type'].upper().replace('_', ' ')}")
+                append(f"      Position: ({zone['position'][0]:.1f}, {zone['position'][1]:.1f}) | "
+                       f"Intensité: {intensity_str} | Rayon: {zone['radius']:.1f}m")
+                append(f"      Intervention: {zone['intervention_type']} | Urgence: {zone['urgency']}")
+                append(f"      Action: {zone['description']}")
+                append(f"      Équipement: {', '.join(zone['equipment'])}")
+        
+        append("")  # Saut de ligne final
+        sys.stdout.write("\n".join(lines))
@@ -1,7 +1,20 @@
+import math
+from collections import namedtuple
 import numpy as np
-import random
 import config
 
+# Événement de déplacement enregistré dans Drone.events (champs dans l'ordre de l'export CSV)
+Event = namedtuple('Event', 'step action start_x start_y end_x end_y battery')
+
+# Décalages (dx, dy) du disque de rayon 15 réservé autour d'une cible d'exploration
+# (ordre : dx puis dy, identique aux anciennes boucles imbriquées)
+_RESERVATION_OFFSETS = np.array([
+    (dx, dy)
+    for dx in range(-15, 16)
+    for dy in range(-15, 16)
+    if dx*dx + dy*dy <= 15*15
+])
+
 class Drone:
     """
     Drone autonome avec cartes personnelles et stratégies:
@@ -22,6 +35,9 @@ class Drone:
     - 'mixte': Explore → si anomalie → va vers elle, si plus urgente en route → traite urgente d'abord
     """
     
+    # Rayon (au carré) en deçà duquel le drone est considéré à la base
+    AT_BASE_RADIUS_SQ = 3.0 * 3.0
+    
     def __init__(self, drone_id, x, y, detector, base_x=0, base_y=0, 
                  vision_radius=5.0, movement_cost=0.5):
         """
@@ -53,8 +69,12 @@ class Drone:
         self.battery = 150.0
         self.battery_max = 150.0
         self.is_at_base = False
-        self.path_history = [(x, y)]
-        self.events = []  # Historique détaillé des déplacements
+        # Historique des positions : tampon float32 agrandi par doublement (voir record_position)
+        self._path = np.empty((256, 2), dtype=np.float32)
+        self._path[0] = (x, y)
+        self._path_len = 1
+        self.events = []  # Historique détaillé des déplacements (Event)
+        self.current_step = None  # Tour en cours (défini par update)
         
         # Carte personnelle du monde exploré (UNIQUEMENT CE DRONE)
         self.personal_exploration_map = {}  # Position -> booléen exploré
@@ -93,21 +113,32 @@ class Drone:
         # Référence au centre de contrôle (sera défini après initialisation)
         self.control_center = None
 
+    @property
+    def path_history(self):
+        """Positions successives du drone : vue (n, 2) sur le tampon, sans copie."""
+        return self._path[:self._path_len]
+
+    def record_position(self):
+        """Ajoute la position courante à l'historique (capacité doublée si le tampon est plein)."""
+        if self._path_len == len(self._path):
+            grown = np.empty((2 * len(self._path), 2), dtype=self._path.dtype)
+            grown[:self._path_len] = self._path
+            self._path = grown
+        self._path[self._path_len] = (self.x, self.y)
+        self._path_len += 1
+
     def log_event(self, action, start_pos, end_pos, battery_after):
         """Enregistre un événement de déplacement ou de retour."""
-        self.events.append({
-            'step': getattr(self, 'current_step', None),
-            'action': action,
-            'start_x': start_pos[0],
-            'start_y': start_pos[1],
-            'end_x': end_pos[0],
-            'end_y': end_pos[1],
-            'battery': battery_after
-        })
+        self.events.append(Event(
+            self.current_step, action,
+            start_pos[0], start_pos[1],
+            end_pos[0], end_pos[1],
+            battery_after
+        ))
         
     def calculate_distance(self, x1, y1, x2, y2):
-        """Calcule la distance euclidienne."""
-        return np.sqrt((x1 - x2)**2 + (y1 - y2)**2)
+        """Calcule la distance euclidienne (scalaires : math.sqrt évite le passage par numpy)."""
+        return math.sqrt((x1 - x2)**2 + (y1 - y2)**2)
     
     def calculate_return_cost(self):
         """
@@ -146,7 +177,7 @@ class Drone:
         unexplored_zones = []
         for y in range(0, environment.height, 10):
             for x in range(0, environment.width, 10):
-                if environment.exploration_map[y, x] == 0:
+                if not environment.exploration_map[y, x]:
                     unexplored_zones.append((x, y))
         
         # Si tout est exploré, pas besoin de continuer
@@ -223,6 +254,7 @@ class Drone:
         }
         
         # Communiquer aux drones proches
+        comm_radius = config.COMMUNICATION_RADIUS
         for other_drone in other_drones:
             if other_drone.id == self.id:
                 continue
@@ -232,7 +264,7 @@ class Drone:
                 other_drone.x, other_drone.y
             )
             
-            if distance <= config.COMMUNICATION_RADIUS:
+            if distance <= comm_radius:
                 other_drone.receive_action_announcement(self.next_planned_action)
     
     def receive_action_announcement(self, action_info):
@@ -265,13 +297,10 @@ class Drone:
         
         elif action_info['type'] == 'explore':
             # Marquer la zone comme étant explorée par un autre drone
-            # On marque une zone autour de la cible (rayon de vision)
+            # On marque une zone autour de la cible (rayon de vision approximatif)
             target_x, target_y = target_pos
-            for dx in range(-15, 16):  # Rayon de vision approximatif
-                for dy in range(-15, 16):
-                    if dx*dx + dy*dy <= 15*15:  # Cercle de rayon vision_radius
-                        zone_key = (int(target_x + dx), int(target_y + dy))
-                        self.zones_being_explored_by_others[zone_key] = drone_id
+            zone_keys = self.get_reservation_zone(target_x, target_y)
+            self.zones_being_explored_by_others.update(dict.fromkeys(zone_keys, drone_id))
             
             # Si ma cible est dans cette zone, annuler et chercher ailleurs
             if self.target_x is not None and self.target_y is not None:
@@ -281,15 +310,37 @@ class Drone:
                     self.target_y = None
                     self.target_anomaly = None
     
+    @staticmethod
+    def get_reservation_zone(target_x, target_y, map_size=None):
+        """
+        Calcule en une seule opération les cases du disque (rayon 15) réservé autour d'une cible.
+        
+        Args:
+            target_x, target_y: Position de la cible
+            map_size: (largeur, hauteur) pour ne garder que les cases dans la carte (None = pas de filtre)
+        
+        Returns:
+            Liste des clés (x, y) dans l'ordre des anciennes boucles imbriquées
+        """
+        # astype(int) tronque vers zéro, comme int()
+        zone_x = (target_x + _RESERVATION_OFFSETS[:, 0]).astype(int)
+        zone_y = (target_y + _RESERVATION_OFFSETS[:, 1]).astype(int)
+        
+        if map_size is not None:
+            inside = (zone_x >= 0) & (zone_x < map_size[0]) & (zone_y >= 0) & (zone_y < map_size[1])
+            zone_x = zone_x[inside]
+            zone_y = zone_y[inside]
+        
+        return list(zip(zone_x.tolist(), zone_y.tolist()))
+    
     def share_exploration_map(self, other_drone):
         """
         Partage sa carte d'exploration avec un autre drone.
         Inclut : zones explorées + anomalies détectées + anomalies en traitement par d'autres + cible actuelle
         """
-        # Partager les zones explorées
-        for pos, explored in self.personal_exploration_map.items():
-            if explored and pos not in other_drone.personal_exploration_map:
-                other_drone.personal_exploration_map[pos] = True
+        # Partager les zones explorées (toutes les valeurs valent True : fusion directe,
+        # les cases déjà connues gardent leur place, les nouvelles sont ajoutées dans l'ordre)
+        other_drone.personal_exploration_map.update(self.personal_exploration_map)
         
         # Partager les anomalies détectées
         for pos, anomaly_data in self.personal_anomaly_map.items():
@@ -310,12 +361,8 @@ class Drone:
         if self.target_x is not None and self.target_y is not None and self.target_anomaly is None:
             # Seulement si c'est une cible d'exploration (pas une anomalie)
             # Marquer une zone autour de ma cible comme "en cours d'exploration par moi"
-            for dx in range(-15, 16):
-                for dy in range(-15, 16):
-                    if dx*dx + dy*dy <= 225:  # Rayon 15 (vision_radius)
-                        zone_key = (int(self.target_x + dx), int(self.target_y + dy))
-                        if 0 <= zone_key[0] < 100 and 0 <= zone_key[1] < 100:  # Limites de la carte
-                            other_drone.zones_being_explored_by_others[zone_key] = self.id
+            zone_keys = self.get_reservation_zone(self.target_x, self.target_y, map_size=(100, 100))
+            other_drone.zones_being_explored_by_others.update(dict.fromkeys(zone_keys, self.id))
     
     def sync_with_control_center(self, control_center):
         """
@@ -326,24 +373,25 @@ class Drone:
             return False
         
         # Recevoir TOUTES les informations du centre de contrôle
-        # CARTE D'EXPLORATION GLOBALE
-        for y in range(control_center.global_exploration_map.shape[0]):
-            for x in range(control_center.global_exploration_map.shape[1]):
-                if control_center.global_exploration_map[y, x] == 1:
-                    pos_key = (x, y)
-                    if pos_key not in self.personal_exploration_map:
-                        self.personal_exploration_map[pos_key] = True
+        # CARTE D'EXPLORATION GLOBALE : cases explorées trouvées en une passe numpy
+        # (parcours ligne par ligne, comme une boucle y/x), seules les nouvelles sont ajoutées
+        ys, xs = np.nonzero(control_center.global_exploration_map == 1)
+        personal_map = self.personal_exploration_map
+        for pos_key in zip(xs.tolist(), ys.tolist()):
+            if pos_key not in personal_map:
+                personal_map[pos_key] = True
         
         # ANOMALIES DÉTECTÉES GLOBALES
+        detected_positions = {a.get('position') for a in self.detected_anomalies}
         for pos, anomaly_data in control_center.global_anomaly_map.items():
             if pos not in self.personal_anomaly_map:
                 self.personal_anomaly_map[pos] = anomaly_data
                 # Ajouter aux anomalies à traiter si pas déjà traitée ET pas déjà dans la liste
                 anomaly_obj = anomaly_data.get('anomaly')
                 anomaly_pos = anomaly_data.get('position')
-                already_in_detected = any(a.get('position') == anomaly_pos for a in self.detected_anomalies)
-                if anomaly_obj is not None and not anomaly_obj.treated and not already_in_detected:
+                if anomaly_obj is not None and not anomaly_obj.treated and anomaly_pos not in detected_positions:
                     self.detected_anomalies.append(anomaly_data)
+                    detected_positions.add(anomaly_pos)
         
         return True
     
@@ -354,9 +402,10 @@ class Drone:
         """
         detected = []
         
-        for anomaly in environment.anomalies:
+        # Seules les anomalies des cellules voisines (index spatial) sont testées
+        for anomaly in environment.get_nearby_anomalies(self.x, self.y, self.vision_radius):
             # Ignorer les anomalies déjà traitées
-            if getattr(anomaly, 'treated', False):
+            if anomaly.treated:
                 continue
             distance = self.calculate_distance(
                 self.x, self.y, 
@@ -378,15 +427,46 @@ class Drone:
         x_max = min(environment.width - 1, int(self.x + self.vision_radius))
         y_min = max(0, int(self.y - self.vision_radius))
         y_max = min(environment.height - 1, int(self.y + self.vision_radius))
+        if x_min > x_max or y_min > y_max:
+            return detected  # Drone hors de la carte : rien à marquer
+        
+        # Masque du disque de vision sur la boîte englobante (lignes = y, colonnes = x)
+        xs = np.arange(x_min, x_max + 1)
+        ys = np.arange(y_min, y_max + 1)
         vr2 = self.vision_radius * self.vision_radius
-        for xi in range(x_min, x_max + 1):
-            for yi in range(y_min, y_max + 1):
-                if (xi - self.x) ** 2 + (yi - self.y) ** 2 <= vr2:
-                    self.personal_exploration_map[(xi, yi)] = True
-                    environment.mark_explored(xi, yi, radius=0)  # radius=0 : marquer uniquement cette case
+        mask = ((xs[np.newaxis, :] - self.x) ** 2 + (ys[:, np.newaxis] - self.y) ** 2) <= vr2
+        environment.stamp_explored(x_min, y_min, mask)
+        
+        # Carte personnelle : cases parcourues par x puis y (ordre d'insertion conservé)
+        xi_idx, yi_idx = np.nonzero(mask.T)
+        self.personal_exploration_map.update(
+            dict.fromkeys(zip((xi_idx + x_min).tolist(), (yi_idx + y_min).tolist()), True)
+        )
         
         return detected
     
+    def get_nearby_drones(self, other_drones):
+        """
+        Retourne les autres drones dans le rayon de communication (ordre de la liste conservé).
+        Les positions ne changent pas avant le déplacement du drone : update() calcule
+        cette liste une seule fois et la réutilise pour toutes ses communications du tour.
+        """
+        nearby = []
+        comm_radius = config.COMMUNICATION_RADIUS
+        for other_drone in other_drones:
+            if other_drone.id == self.id:
+                continue
+            
+            distance = self.calculate_distance(
+                self.x, self.y,
+                other_drone.x, other_drone.y
+            )
+            
+            if distance <= comm_radius:
+                nearby.append(other_drone)
+        
+        return nearby
+    
     def communicate_with_nearby_drones(self, other_drones, reverse_order=False):
         """
         Communique avec les drones à proximité au DÉBUT de chaque tour.
@@ -401,31 +481,23 @@ class Drone:
         - Puis en ordre inverse: C→B→A (C partage avec B, B partage avec A)
         Cela assure que les informations circulent dans les deux sens et se propagent transitivement.
         """
-        drones_list = list(other_drones)
+        # Drones dans le rayon de communication
+        drones_list = self.get_nearby_drones(other_drones)
         if reverse_order:
             drones_list = drones_list[::-1]  # Inverser l'ordre
         
         for other_drone in drones_list:
-            if other_drone.id == self.id:
-                continue
-            
-            distance = self.calculate_distance(
-                self.x, self.y,
-                other_drone.x, other_drone.y
-            )
-            
-            # Si dans le rayon de communication
-            if distance <= config.COMMUNICATION_RADIUS:
-                # Partager ma carte avec l'autre drone
-                self.share_exploration_map(other_drone)
-                # Recevoir sa carte
-                other_drone.share_exploration_map(self)
+            # Partager ma carte avec l'autre drone
+            self.share_exploration_map(other_drone)
+            # Recevoir sa carte
+            other_drone.share_exploration_map(self)
     
     def communicate_discovery(self, other_drones, anomaly_info):
         """
         Communique la découverte d'une anomalie aux drones à proximité.
         Les drones dans le rayon de vision reçoivent l'information.
         """
+        comm_radius = config.COMMUNICATION_RADIUS
         for other_drone in other_drones:
             if other_drone.id == self.id:
                 continue  # Ne pas se parler à soi-même
@@ -436,7 +508,7 @@ class Drone:
             )
             
             # Si dans le rayon de communication (rayon de vision)
-            if distance <= config.COMMUNICATION_RADIUS:
+            if distance <= comm_radius:
                 # L'autre drone reçoit l'information
                 other_drone.receive_anomaly_info(anomaly_info)
     
@@ -452,9 +524,10 @@ class Drone:
             self.detected_anomalies.append(anomaly_info)
             # NE PAS ajouter à direct_detections car c'est une TRANSMISSION, pas une détection directe
     
-    def treat_anomaly(self, anomaly_info):
+    def treat_anomaly(self, anomaly_info, environment):
         """
         Traite une anomalie (action instantanée).
+        Le traitement passe toujours par environment.mark_treated (compteurs et tableaux à jour).
         Coût : 5 batterie pour faible (1), 15 batterie pour intense (2)
         
         Sécurité: traite seulement si on peut revenir à la base APRÈS traitement
@@ -463,7 +536,7 @@ class Drone:
         anomaly_obj = anomaly_info.get('anomaly')
         
         # Sécurité : vérifier que l'objet anomalie existe et n'a pas déjà été traité
-        if anomaly_obj is None or getattr(anomaly_obj, 'treated', False):
+        if anomaly_obj is None or anomaly_obj.treated:
             # L'anomalie n'existe plus ou est déjà traitée
             pos = anomaly_info.get('position')
             if pos:
@@ -484,7 +557,7 @@ class Drone:
         if self.battery >= total_cost:
             self.battery -= treatment_cost
             # Marquer l'anomalie réelle comme traitée
-            anomaly_obj.treated = True
+            environment.mark_treated(anomaly_obj)
             anomaly_obj.being_treated_by = -1  # Réinitialiser le traitement
             
             # Retirer de la liste "en cours de traitement"
@@ -523,7 +596,7 @@ class Drone:
         # ========== STRATÉGIE EXPLORATION ==========
         if strategy == 'exploration':
             # Calculer le % d'exploration actuel
-            current_exploration_pct = (environment.exploration_map.sum() / environment.exploration_map.size)
+            current_exploration_pct = (environment.explored_count / environment.explored_total)
             
             # Vérifier si carte à 100%
             exploration_complete = current_exploration_pct >= 0.999
@@ -555,7 +628,7 @@ class Drone:
             # PRIORITÉ 1 : Si déjà en train de traiter une anomalie, continuer
             if self.target_anomaly is not None:
                 anomaly_obj = self.target_anomaly.get('anomaly')
-                if anomaly_obj and not getattr(anomaly_obj, 'treated', False):
+                if anomaly_obj and not anomaly_obj.treated:
                     # Continuer vers cette anomalie
                     pass  # Garder la cible actuelle
                 else:
@@ -565,13 +638,13 @@ class Drone:
             # PRIORITÉ 2 : Chercher anomalies INTENSE accessibles
             if self.target_anomaly is None:
                 intense_anomalies = []
+                treatment = config.TREATMENT_COST_INTENSE
                 for anom in self.detected_anomalies:
                     anom_obj = anom.get('anomaly')
-                    if anom_obj and anom_obj.intensity == 2 and not getattr(anom_obj, 'treated', False):
+                    if anom_obj and anom_obj.intensity == 2 and not anom_obj.treated:
                         pos = anom.get('position')
                         dist_to = self.calculate_distance(self.x, self.y, pos[0], pos[1])
                         dist_back = self.calculate_distance(pos[0], pos[1], self.base_x, self.base_y)
-                        treatment = config.TREATMENT_COST_INTENSE
                         total_cost = (dist_to + dist_back) * self.movement_cost + treatment
                         
                         if self.battery >= total_cost:
@@ -588,13 +661,13 @@ class Drone:
             # PRIORITÉ 3 : Si pas d'anomalie intense, chercher anomalies FAIBLE accessibles
             if self.target_anomaly is None:
                 weak_anomalies = []
+                treatment = config.TREATMENT_COST_WEAK
                 for anom in self.detected_anomalies:
                     anom_obj = anom.get('anomaly')
-                    if anom_obj and anom_obj.intensity == 1 and not getattr(anom_obj, 'treated', False):
+                    if anom_obj and anom_obj.intensity == 1 and not anom_obj.treated:
                         pos = anom.get('position')
                         dist_to = self.calculate_distance(self.x, self.y, pos[0], pos[1])
                         dist_back = self.calculate_distance(pos[0], pos[1], self.base_x, self.base_y)
-                        treatment = config.TREATMENT_COST_WEAK
                         total_cost = (dist_to + dist_back) * self.movement_cost + treatment
                         
                         if self.battery >= total_cost:
@@ -663,7 +736,7 @@ class Drone:
     def _select_exploration_target(self, environment):
         """Sélectionne la case non explorée la plus proche ET accessible avec la batterie actuelle."""
         # Chercher dans la carte globale pour les zones non explorées
-        unexplored = np.argwhere(environment.exploration_map == 0)
+        unexplored = np.argwhere(~environment.exploration_map)
         
         if len(unexplored) == 0:
             # Toute la carte explorée → retour base
@@ -676,44 +749,39 @@ class Drone:
         self.zones_being_explored_by_others = {
             pos: drone_id for pos, drone_id in self.zones_being_explored_by_others.items()
             if (0 <= pos[0] < environment.width and 0 <= pos[1] < environment.height and
-                environment.exploration_map[pos[1], pos[0]] == 0)  # Seulement si pas encore explorée et dans limites
+                not environment.exploration_map[pos[1], pos[0]])  # Seulement si pas encore explorée et dans limites
         }
         
         # Trouver la plus proche accessible qui n'est PAS ciblée par un autre drone
         # ET qui est accessible avec la batterie actuelle
+        # (calcul vectorisé sur toutes les cases non explorées en une seule passe)
+        ys = unexplored[:, 0]
+        xs = unexplored[:, 1]
+
+        # Masque des zones déjà ciblées par un autre drone
+        reserved = np.zeros(environment.exploration_map.shape, dtype=bool)
+        if self.zones_being_explored_by_others:
+            reserved_x, reserved_y = np.array(list(self.zones_being_explored_by_others.keys())).T
+            reserved[reserved_y, reserved_x] = True
+
+        # Calculer distance et coût batterie pour aller à chaque zone ET revenir à la base
+        dist_to_target = np.sqrt((xs - self.x)**2 + (ys - self.y)**2)
+        dist_target_to_base = np.sqrt((xs - self.base_x)**2 + (ys - self.base_y)**2)
+        total_cost = (dist_to_target + dist_target_to_base) * self.movement_cost
+
+        # FILTRAGE : Garder seulement les zones libres et accessibles avec la batterie actuelle
+        candidates = np.flatnonzero(~reserved[ys, xs] & ~(self.battery < total_cost))
+
         best_target = None
-        best_dist = float('inf')
-        
-        for point in unexplored:
-            pos_key = (point[1], point[0])
-            
-            # Ignorer si cette zone est déjà ciblée par un autre drone
-            if pos_key in self.zones_being_explored_by_others:
-                continue
-            
-            # Calculer distance et coût batterie pour aller à cette zone ET revenir à la base
-            dist_to_target = self.calculate_distance(point[1], point[0], self.x, self.y)
-            dist_target_to_base = self.calculate_distance(point[1], point[0], self.base_x, self.base_y)
-            
-            total_distance = dist_to_target + dist_target_to_base
-            total_cost = total_distance * self.movement_cost
-            
-            # FILTRAGE : Garder seulement les zones accessibles avec la batterie actuelle
-            if self.battery < total_cost:
-                continue  # Zone inaccessible, ignorer
-            
-            # Prendre la plus proche parmi les zones accessibles
-            if dist_to_target < best_dist:
-                best_dist = dist_to_target
-                best_target = point
-        
+        if len(candidates) > 0:
+            # Prendre la plus proche parmi les zones accessibles (première en cas d'égalité)
+            best_target = unexplored[candidates[np.argmin(dist_to_target[candidates])]]
+
         if best_target is not None:
             self.target_x = best_target[1]
             self.target_y = best_target[0]
             self.target_anomaly = None
             self.exploration_blocked_from_base = False  # On a trouvé une zone, débloqué
-            if len(unexplored) < 1000:  # Afficher seulement vers la fin
-                zones_evitees = sum(1 for p in unexplored if (p[1], p[0]) in self.zones_being_explored_by_others)
         else:
             # Aucune zone accessible avec la batterie actuelle
             # Si on est à la base → exploration complètement bloquée
@@ -733,8 +801,8 @@ class Drone:
             a for a in self.detected_anomalies
             if (int(a['position'][0]), int(a['position'][1])) not in self.anomalies_being_treated_by_others
             and a.get('anomaly') is not None
-            and not getattr(a.get('anomaly'), 'treated', False)
-            and getattr(a.get('anomaly'), 'being_treated_by', -1) == -1
+            and not a['anomaly'].treated
+            and a['anomaly'].being_treated_by == -1
         ]
         
         # Si aucune anomalie personnelle, utiliser les anomalies du centre de contrôle
@@ -743,8 +811,8 @@ class Drone:
                 a for pos, a in self.control_center.global_anomaly_map.items()
                 if pos not in self.anomalies_being_treated_by_others
                 and a.get('anomaly') is not None
-                and not getattr(a.get('anomaly'), 'treated', False)
-                and getattr(a.get('anomaly'), 'being_treated_by', -1) == -1
+                and not a['anomaly'].treated
+                and a['anomaly'].being_treated_by == -1
             ]
         
         # FILTRE : Garder seulement les anomalies accessibles avec batterie actuelle
@@ -799,7 +867,7 @@ class Drone:
         # Calculer le coût du prochain mouvement
         dx = self.target_x - self.x
         dy = self.target_y - self.y
-        distance_to_target = np.sqrt(dx**2 + dy**2)
+        distance_to_target = math.sqrt(dx**2 + dy**2)
         next_move_distance = min(self.speed, distance_to_target)
         next_move_cost = next_move_distance * self.movement_cost
         
@@ -808,11 +876,13 @@ class Drone:
             self.target_x = self.base_x
             self.target_y = self.base_y
             self.target_anomaly = None
+            # La cible a changé : recalculer la direction (sinon on réutilise celle calculée ci-dessus)
+            dx = self.target_x - self.x
+            dy = self.target_y - self.y
+            distance_to_target = math.sqrt(dx**2 + dy**2)
         
         prev_x, prev_y = self.x, self.y
-        dx = self.target_x - self.x
-        dy = self.target_y - self.y
-        distance = np.sqrt(dx**2 + dy**2)
+        distance = distance_to_target
         
         if distance < self.speed:
             # Arrivé à la cible
@@ -828,24 +898,26 @@ class Drone:
         self.y = max(0, min(self.y, environment.height))
         
         # Consommer batterie proportionnellement à la distance parcourue
-        distance_traveled = np.hypot(self.x - prev_x, self.y - prev_y)
+        distance_traveled = math.hypot(self.x - prev_x, self.y - prev_y)
         self.battery -= self.movement_cost * distance_traveled
         self.battery = max(0, self.battery)  # Empêcher batterie négative
         
         # Marquer le chemin comme exploré pour éviter les trous
-        steps = max(int(np.hypot(self.x - prev_x, self.y - prev_y) * 2), 1)
+        steps = max(int(distance_traveled * 2), 1)
+        span_x, span_y = self.x - prev_x, self.y - prev_y
+        personal_map = self.personal_exploration_map
+        mark_explored = environment.mark_explored
         for i in range(steps + 1):
-            xi = prev_x + (self.x - prev_x) * (i / steps)
-            yi = prev_y + (self.y - prev_y) * (i / steps)
-            exploration_key = (int(xi), int(yi))
-            self.personal_exploration_map[exploration_key] = True
-            environment.mark_explored(xi, yi)
+            xi = prev_x + span_x * (i / steps)
+            yi = prev_y + span_y * (i / steps)
+            personal_map[(int(xi), int(yi))] = True
+            mark_explored(xi, yi)
         
         action = 'return_to_base' if (self.target_x == self.base_x and self.target_y == self.base_y) else 'move'
         self.log_event(action, (prev_x, prev_y), (self.x, self.y), self.battery)
 
         # Enregistrer dans l'historique
-        self.path_history.append((self.x, self.y))
+        self.record_position()
     
     def update(self, environment, other_drones, step):
         """
@@ -857,19 +929,20 @@ class Drone:
         # Déterminer l'activité pour ce tour (sera mise à jour dans les différentes phases)
         current_activity = None
         
+        # Voisins calculés une seule fois : aucune position ne change avant le déplacement (PHASE 3)
+        nearby_drones = self.get_nearby_drones(other_drones)
+        
         # PHASE 0 : COMMUNICATION avec drones proches (DÉBUT DU TOUR)
         # Passage 1: Communication normale (A→B→C)
-        self.communicate_with_nearby_drones(other_drones, reverse_order=False)
+        self.communicate_with_nearby_drones(nearby_drones, reverse_order=False)
         
         # Passage 2: Communication inverse (C→B→A) pour propagation transitive
-        self.communicate_with_nearby_drones(other_drones, reverse_order=True)
+        self.communicate_with_nearby_drones(nearby_drones, reverse_order=True)
         
-        # Vérifier si à la base
-        dist_to_base = self.calculate_distance(
-            self.x, self.y,
-            self.base_x, self.base_y
-        )
-        self.is_at_base = dist_to_base < 3.0
+        # Vérifier si à la base (distance au carré : pas de racine)
+        dx_base = self.x - self.base_x
+        dy_base = self.y - self.base_y
+        self.is_at_base = dx_base * dx_base + dy_base * dy_base < self.AT_BASE_RADIUS_SQ
         
         # Recharge à la base
         if self.is_at_base:
@@ -918,7 +991,7 @@ class Drone:
                     # Sinon : anomalie impossible (cost > BATTERY_MAX), ne rien faire
                 
                 # Communiquer la découverte aux autres drones
-                self.communicate_discovery(other_drones, anomaly_det)
+                self.communicate_discovery(nearby_drones, anomaly_det)
         
         # PHASE 2 : Décider de l'action
         
@@ -933,7 +1006,7 @@ class Drone:
             # SYNCHRONISATION complète avec le centre avant de partir
             self.sync_with_control_center(self.control_center) if self.control_center else None
             self.select_next_target(environment, other_drones)
-            # exploration_pct calculable si besoin de logs : (environment.exploration_map.sum() / environment.exploration_map.size) * 100
+            # exploration_pct calculable si besoin de logs : (environment.explored_count / environment.explored_total) * 100
         
         # 2C : Si pas de cible, en sélectionner une
         elif self.target_x is None or self.target_y is None:
@@ -950,10 +1023,10 @@ class Drone:
                 
                 if self.battery >= treatment_cost:
                     # Assez de batterie → annoncer qu'on va traiter cette anomalie
-                    self.announce_next_action('treat_anomaly', (self.target_x, self.target_y), other_drones, self.target_anomaly)
+                    self.announce_next_action('treat_anomaly', (self.target_x, self.target_y), nearby_drones, self.target_anomaly)
             elif self.target_x is not None:
                 # Exploration
-                self.announce_next_action('explore', (self.target_x, self.target_y), other_drones)
+                self.announce_next_action('explore', (self.target_x, self.target_y), nearby_drones)
         
         # 2D : Si à proximité de la cible
         elif self.calculate_distance(self.x, self.y, self.target_x, self.target_y) < 3.0:
@@ -973,13 +1046,13 @@ class Drone:
                 
                 # Vérifier si on a assez de batterie pour traiter ET revenir à la base
                 if self.battery >= total_cost:
-                    if self.treat_anomaly(self.target_anomaly):
+                    if self.treat_anomaly(self.target_anomaly, environment):
                         # Traitement réussi
                         if self.target_anomaly in self.detected_anomalies:
                             self.detected_anomalies.remove(self.target_anomaly)
                         
                         # Communiquer qu'on traite l'anomalie
-                        self.communicate_discovery(other_drones, {
+                        self.communicate_discovery(nearby_drones, {
                             **self.target_anomaly,
                             'status': 'treated'
                         })
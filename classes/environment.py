@@ -1,21 +1,54 @@
 import numpy as np
 from typing import List
-from classes.anomaly import Anomaly
+from classes.anomaly import Anomaly, ANOMALY_KIND_CODES
+
+# Valeurs capteurs de base (environnement sain) : [température, radiation, météorites, inondations]
+_SENSOR_BASELINE = np.array([20.0, 0.1, 0.1, 0.1])
+
+# Influence du terrain sur les capteurs, indexée par type de terrain (0=plaine, 1=forêt, 2=rivière, 3=lac)
+_TERRAIN_SENSOR_DELTA = np.array([
+    [0.0, 0.0, 0.0, 0.0],    # Plaine : pas de modification
+    [-2.0, 0.0, 0.0, 0.0],   # Forêt : température légèrement plus basse
+    [-3.0, 0.0, 0.0, 0.15],  # Rivière : plus frais, augmentation des inondations
+    [-4.0, 0.0, 0.0, 0.1],   # Lac : encore plus frais, légère augmentation des inondations
+])
 
 class Environment:
     """
     Environnement simulé contenant des anomalies et différents types de terrain.
     """
-    def __init__(self, width=100, height=100, base_x=None, base_y=None):
+    GRID_CELL_SIZE = 5  # Taille par défaut des cellules de l'index spatial des anomalies
+    # Tableaux contigus des anomalies (voir __init__), agrandis ensemble par add_anomaly
+    _ANOMALY_ARRAYS = ('anomaly_x', 'anomaly_y', 'anomaly_radius', 'anomaly_intensity', 'anomaly_kind', 'anomaly_treated')
+
+    def __init__(self, width=100, height=100, base_x=None, base_y=None, rng=None, grid_cell_size=None):
         self.width = width
         self.height = height
         self.base_x = base_x  # Position de la base
         self.base_y = base_y
         self.anomalies: List[Anomaly] = []
-        self.exploration_map = np.zeros((height, width))  # 0 = non exploré, 1 = exploré
+        # Générateur propre à l'environnement (terrain et évolution des anomalies)
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self._grid = {}  # Index spatial : (cellule_x, cellule_y) -> indices des anomalies dans self.anomalies
+        # Taille des cellules : idéalement le rayon des requêtes (vision), qui ne couvrent alors que 3x3 cellules
+        self.grid_cell_size = grid_cell_size or self.GRID_CELL_SIZE
+        # Copie en tableaux contigus (un tableau par champ, même indice que self.anomalies) pour les
+        # requêtes vectorisées ; seules les len(self.anomalies) premières cases sont valides
+        self.anomaly_x = np.empty(64)
+        self.anomaly_y = np.empty(64)
+        self.anomaly_radius = np.empty(64)
+        self.anomaly_intensity = np.zeros(64, dtype=np.int8)
+        self.anomaly_kind = np.zeros(64, dtype=np.uint8)  # Voir ANOMALY_KIND_CODES
+        self.anomaly_treated = np.zeros(64, dtype=bool)
+        self.anomalies_dirty = False  # Vrai si une anomalie a été traitée depuis le dernier nettoyage
+        self.untreated_count = 0  # Nombre d'anomalies non traitées (tenu à jour par add_anomaly / mark_treated)
+        self.anomaly_revision = 0  # Incrémenté à chaque ajout ou modification d'une anomalie (ajout, traitement, évolution)
+        self.exploration_map = np.zeros((height, width), dtype=bool)  # False = non exploré, True = exploré
+        self.explored_count = 0  # Nombre de cases explorées (tenu à jour par mark_explored / stamp_explored)
+        self.explored_total = width * height  # Nombre total de cases
         
         # Carte de terrain : 0=plaine, 1=forêt, 2=rivière, 3=lac
-        self.terrain_map = np.zeros((height, width), dtype=int)
+        self.terrain_map = np.zeros((height, width), dtype=np.uint8)
         self._generate_terrain()
 
     
@@ -25,60 +58,60 @@ class Environment:
         """
         # 1. Plaines par défaut (déjà initialisé à 0)
         
+        # Coordonnées de toutes les cases (calcul des disques sur toute la grille en une opération)
+        grid_y, grid_x = np.mgrid[0:self.height, 0:self.width]
+        
         # 2. Génération de forêts (zones denses)
-        num_forests = np.random.randint(3, 6)
+        num_forests = self.rng.integers(3, 6)
         for _ in range(num_forests):
-            center_x = np.random.randint(10, self.width - 10)
-            center_y = np.random.randint(10, self.height - 10)
-            radius = np.random.uniform(8, 15)
+            center_x = self.rng.integers(10, self.width - 10)
+            center_y = self.rng.integers(10, self.height - 10)
+            radius = self.rng.uniform(8, 15)
             
-            for y in range(self.height):
-                for x in range(self.width):
-                    dist = np.sqrt((x - center_x)**2 + (y - center_y)**2)
-                    if dist < radius:
-                        # Densité de forêt diminue avec la distance
-                        prob = 1.0 - (dist / radius)
-                        if np.random.random() < prob * 0.8:
-                            self.terrain_map[y, x] = 1  # Forêt
+            dist = np.sqrt((grid_x - center_x)**2 + (grid_y - center_y)**2)
+            in_disk = dist < radius
+            # Densité de forêt diminue avec la distance
+            prob = 1.0 - (dist[in_disk] / radius)
+            # Un tirage par case du disque, dans l'ordre ligne par ligne (même séquence qu'une boucle y/x)
+            draws = self.rng.random(prob.size)
+            forest = np.zeros_like(in_disk)
+            forest[in_disk] = draws < prob * 0.8
+            self.terrain_map[forest] = 1  # Forêt
         
         # 3. Génération de lacs (zones circulaires)
-        num_lakes = np.random.randint(2, 4)
+        num_lakes = self.rng.integers(2, 4)
         for _ in range(num_lakes):
-            center_x = np.random.randint(15, self.width - 15)
-            center_y = np.random.randint(15, self.height - 15)
-            radius = np.random.uniform(5, 10)
+            center_x = self.rng.integers(15, self.width - 15)
+            center_y = self.rng.integers(15, self.height - 15)
+            radius = self.rng.uniform(5, 10)
             
-            for y in range(self.height):
-                for x in range(self.width):
-                    dist = np.sqrt((x - center_x)**2 + (y - center_y)**2)
-                    if dist < radius:
-                        self.terrain_map[y, x] = 3  # Lac
+            dist = np.sqrt((grid_x - center_x)**2 + (grid_y - center_y)**2)
+            self.terrain_map[dist < radius] = 3  # Lac
         
         # 4. Génération de rivières (chemins sinueux)
-        num_rivers = np.random.randint(1, 3)
+        num_rivers = self.rng.integers(1, 3)
         for _ in range(num_rivers):
             # Point de départ aléatoire sur un bord
-            if np.random.random() < 0.5:
-                x, y = 0, np.random.randint(0, self.height)
-                direction = np.random.uniform(0, np.pi/2)  # Vers la droite
+            if self.rng.random() < 0.5:
+                x, y = 0, self.rng.integers(0, self.height)
+                direction = self.rng.uniform(0, np.pi/2)  # Vers la droite
             else:
-                x, y = np.random.randint(0, self.width), 0
-                direction = np.random.uniform(np.pi/4, 3*np.pi/4)  # Vers le bas
+                x, y = self.rng.integers(0, self.width), 0
+                direction = self.rng.uniform(np.pi/4, 3*np.pi/4)  # Vers le bas
             
             # Création de la rivière
-            river_length = np.random.randint(40, 80)
+            river_length = self.rng.integers(40, 80)
             width_river = 2
             
             for _ in range(river_length):
-                # Ajouter la rivière avec une certaine largeur
-                for dx in range(-width_river, width_river + 1):
-                    for dy in range(-width_river, width_river + 1):
-                        nx, ny = int(x) + dx, int(y) + dy
-                        if 0 <= nx < self.width and 0 <= ny < self.height:
-                            self.terrain_map[ny, nx] = 2  # Rivière
+                # Ajouter la rivière avec une certaine largeur (bloc carré borné aux limites de la carte)
+                x_int, y_int = int(x), int(y)
+                x0, x1 = max(0, x_int - width_river), min(self.width, x_int + width_river + 1)
+                y0, y1 = max(0, y_int - width_river), min(self.height, y_int + width_river + 1)
+                self.terrain_map[y0:y1, x0:x1] = 2  # Rivière
                 
                 # Avancer dans la direction avec un peu de sinuosité
-                direction += np.random.uniform(-0.3, 0.3)
+                direction += self.rng.uniform(-0.3, 0.3)
                 x += np.cos(direction) * 1.5
                 y += np.sin(direction) * 1.5
                 
@@ -105,8 +138,72 @@ class Environment:
         return terrain_names.get(terrain_type, 'Inconnu')
         
     def add_anomaly(self, anomaly: Anomaly):
-        """Ajoute une anomalie à l'environnement."""
+        """Ajoute une anomalie à l'environnement (et l'enregistre dans l'index spatial et les tableaux)."""
+        index = len(self.anomalies)
+        cell = (int(anomaly.x // self.grid_cell_size), int(anomaly.y // self.grid_cell_size))
+        self._grid.setdefault(cell, []).append(index)
         self.anomalies.append(anomaly)
+        
+        # Tableaux pleins : doubler leur capacité
+        if index == self.anomaly_x.size:
+            for name in self._ANOMALY_ARRAYS:
+                setattr(self, name, np.resize(getattr(self, name), 2 * index))
+        self.anomaly_x[index] = anomaly.x
+        self.anomaly_y[index] = anomaly.y
+        self.anomaly_radius[index] = anomaly.radius
+        self.anomaly_intensity[index] = anomaly.intensity
+        self.anomaly_kind[index] = ANOMALY_KIND_CODES.get(anomaly.type, 0)
+        self.anomaly_treated[index] = anomaly.treated
+        if not anomaly.treated:
+            self.untreated_count += 1
+        self.anomaly_revision += 1
+    
+    def mark_treated(self, anomaly: Anomaly):
+        """Marque une anomalie comme traitée et signale le changement (voir anomalies_dirty)."""
+        if not anomaly.treated:
+            self.untreated_count -= 1
+        anomaly.treated = True
+        self.anomaly_treated[self.index_of(anomaly)] = True
+        self.anomalies_dirty = True
+        self.anomaly_revision += 1
+    
+    def mark_intense(self, anomaly: Anomaly):
+        """Rend une anomalie intense (snowball) en gardant les tableaux à jour."""
+        anomaly.intensity = 2
+        self.anomaly_intensity[self.index_of(anomaly)] = 2
+        self.anomaly_revision += 1
+    
+    def index_of(self, anomaly: Anomaly):
+        """Indice d'une anomalie dans self.anomalies (recherche limitée à sa cellule de l'index spatial)."""
+        cell = (int(anomaly.x // self.grid_cell_size), int(anomaly.y // self.grid_cell_size))
+        for index in self._grid[cell]:
+            if self.anomalies[index] is anomaly:
+                return index
+        raise ValueError("Anomalie absente de l'environnement")
+    
+    def untreated_positions(self):
+        """Positions (x, y) des anomalies non traitées, calculées sur les tableaux contigus."""
+        n = len(self.anomalies)
+        untreated = ~self.anomaly_treated[:n]
+        return zip(self.anomaly_x[:n][untreated].tolist(), self.anomaly_y[:n][untreated].tolist())
+    
+    def get_nearby_anomalies(self, x, y, radius):
+        """
+        Retourne les anomalies candidates autour d'une position, via l'index spatial.
+        Seules les cellules recouvrant le carré [x-radius, x+radius] x [y-radius, y+radius]
+        sont parcourues. Le test de distance exact reste à la charge de l'appelant.
+        L'ordre d'ajout des anomalies est conservé.
+        """
+        cell = self.grid_cell_size
+        cx_min, cx_max = int((x - radius) // cell), int((x + radius) // cell)
+        cy_min, cy_max = int((y - radius) // cell), int((y + radius) // cell)
+        
+        indices = []
+        for cx in range(cx_min, cx_max + 1):
+            for cy in range(cy_min, cy_max + 1):
+                indices.extend(self._grid.get((cx, cy), ()))
+        
+        return [self.anomalies[i] for i in sorted(indices)]
     
     def get_sensor_data(self, x, y):
         """
@@ -114,35 +211,40 @@ class Environment:
         Combine l'influence de toutes les anomalies proches et du terrain.
         """
         # Valeurs de base (environnement sain)
-        sensor_data = [20.0, 0.1, 0.1, 0.1]
+        sensor_data = _SENSOR_BASELINE.copy()
         
-        # Modification selon le type de terrain
-        terrain = self.get_terrain_type(x, y)
-        if terrain == 1:  # Forêt
-            sensor_data[0] -= 2.0  # Température légèrement plus basse
-        elif terrain == 2:  # Rivière
-            sensor_data[3] += 0.15  # Augmentation des inondations
-            sensor_data[0] -= 3.0  # Plus frais
-        elif terrain == 3:  # Lac
-            sensor_data[3] += 0.1  # Légère augmentation des inondations
-            sensor_data[0] -= 4.0  # Encore plus frais
+        # Modification selon le type de terrain (table de correspondance, sans branchement)
+        sensor_data += _TERRAIN_SENSOR_DELTA[self.get_terrain_type(x, y)]
         
         # Accumulation des influences de toutes les anomalies
         for anomaly in self.anomalies:
-            readings = anomaly.get_sensor_reading(x, y)
-            for i in range(4):
-                sensor_data[i] += (readings[i] - [20.0, 0.1, 0.1, 0.1][i])
+            sensor_data += np.subtract(anomaly.get_sensor_reading(x, y), _SENSOR_BASELINE)
         
         # Normalisation et limitation des valeurs
-        sensor_data = [min(max(v, 0), 100) for v in sensor_data]
+        np.clip(sensor_data, 0, 100, out=sensor_data)
         
-        return np.array(sensor_data, dtype=np.float32)
+        return sensor_data.astype(np.float32)
     
     def mark_explored(self, x, y, radius=2):
-        """Marque une zone comme explorée."""
+        """
+        Marque une zone comme explorée (carré de côté 2*radius+1 borné aux limites de la carte).
+        Met à jour explored_count avec le nombre de cases nouvellement explorées.
+        """
         x_int, y_int = int(x), int(y)
-        for dx in range(-radius, radius+1):
-            for dy in range(-radius, radius+1):
-                nx, ny = x_int + dx, y_int + dy
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    self.exploration_map[ny, nx] = 1
+        x0, x1 = max(0, x_int - radius), min(self.width, x_int + radius + 1)
+        y0, y1 = max(0, y_int - radius), min(self.height, y_int + radius + 1)
+        if x0 >= x1 or y0 >= y1:
+            return  # Zone entièrement hors de la carte
+        
+        zone = self.exploration_map[y0:y1, x0:x1]
+        self.explored_count += zone.size - np.count_nonzero(zone)
+        zone[...] = True
+    
+    def stamp_explored(self, x0, y0, mask):
+        """
+        Marque comme explorées les cases True d'un masque booléen dont le coin (haut, gauche)
+        est en (x0, y0). Le masque doit être entièrement contenu dans la carte.
+        """
+        zone = self.exploration_map[y0:y0 + mask.shape[0], x0:x0 + mask.shape[1]]
+        self.explored_count += np.count_nonzero(mask & ~zone)
+        zone[mask] = True
@@ -95,8 +95,10 @@ ROBOT_STRATEGY = 'action'
 # ====================
 SAVE_MOVEMENTS_CSV = True           # Exporter les déplacements en CSV
 SAVE_VISUALIZATION = True           # Sauvegarder l'image PNG
+SHOW_VISUALIZATION = False          # Ouvrir la figure dans une fenêtre (backend interactif) après la sauvegarde
 
 # ====================
 # DEBUG
 # ====================
 VERBOSE = False                     # Afficher les logs détaillés
+STATUS_INTERVAL = None              # Tours entre deux affichages de l'état (VERBOSE). None : max(50, MAX_TURNS // 100)
@@ -1,15 +1,22 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Circle
-import random
+import matplotlib
 from datetime import datetime
+from itertools import count
 import os
+import sys
 import csv
 
 # Import des classes depuis le dossier classes
 from classes import AnomalyDetector, Anomaly, Environment, Drone, ControlCenter
 import config
 
+# Backend non interactif (Agg) sauf si l'affichage de la fenêtre est demandé :
+# doit être choisi avant l'import de pyplot
+if not config.SHOW_VISUALIZATION:
+    matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.patches import Circle
+
 #==============================================================================
 # SYSTÈME AUTONOME DE DRONES COOPÉRATIFS
 # Projet IA pour les Systèmes Complexes 2025
@@ -20,20 +27,21 @@ import config
 # UTILITAIRES DE CONFIGURATION
 # ------------------------------
 
-def set_global_seed(seed):
-    """Fixe l'aléatoire pour numpy et random si un seed est fourni."""
-    if seed is None:
-        return
-    np.random.seed(seed)
-    random.seed(seed)
+def spawn_generators(seed, n):
+    """
+    Crée n générateurs numpy indépendants dérivés d'un même seed (un par composant).
+    seed=None : aléatoire libre (entropie du système).
+    """
+    return [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(n)]
 
-def get_base_position(map_width, map_height, base_config):
+def get_base_position(map_width, map_height, base_config, rng=None):
     """
     Calcule la position de la base selon la configuration.
     
     Args:
         map_width, map_height: Dimensions de la carte
         base_config: Position fixe (x, y), cardinale ('N', 'S', 'E', 'O', etc.), ou 'A'/'RANDOM'
+        rng: Générateur numpy utilisé pour 'A'/'RANDOM' (nouveau générateur si None)
     
     Returns:
         (base_x, base_y)
@@ -58,108 +66,199 @@ def get_base_position(map_width, map_height, base_config):
         if base_config in positions:
             return positions[base_config]
         elif base_config in ('A', 'RANDOM'):
-            return (random.randint(5, map_width - 5), random.randint(5, map_height - 5))
+            if rng is None:
+                rng = np.random.default_rng()
+            x, y = rng.integers(5, [map_width - 5, map_height - 5], endpoint=True)
+            return (int(x), int(y))
     
     # Par défaut
     return (10, 10)
 
+# Compteur des simulations lancées dans ce processus
+_run_counter = count()
+
+def new_run_id():
+    """
+    Identifiant unique d'une simulation, partagé par tous ses fichiers de résultats.
+    Horodatage à la seconde + PID + compteur : pas de collision entre runs rapprochés,
+    y compris lancés en parallèle dans plusieurs processus.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{timestamp}_{os.getpid()}_{next(_run_counter):03d}"
+
 
 # ------------------------------
 # SIMULATION PRINCIPALE
 # ------------------------------
 
-def create_test_environment():
-    """Crée un environnement de test avec plusieurs anomalies."""
-    # Calculer la position de la base d'abord
-    base_x, base_y = get_base_position(config.MAP_WIDTH, config.MAP_HEIGHT, config.BASE_POSITION)
-    
-    env = Environment(width=config.MAP_WIDTH, height=config.MAP_HEIGHT, base_x=base_x, base_y=base_y)
-    
-    # Fonction helper pour générer une position d'anomalie valide
-    def generate_anomaly_position(existing_positions, base_x, base_y):
-        """
-        Génère une position aléatoire pour une anomalie respectant les contraintes:
-        - Distance minimale entre anomalies
-        - Pas sur la base
-        """
-        max_attempts = 500  # Augmenter les tentatives
-        for _ in range(max_attempts):
-            x = random.randint(5, env.width - 5)
-            y = random.randint(5, env.height - 5)
-            
-            # Vérifier distance minimale de la base
-            if np.sqrt((x - base_x)**2 + (y - base_y)**2) < config.ANOMALY_MIN_DISTANCE_FROM_BASE:
-                continue
+def sample_anomaly_positions(rng, n, width, height, base_x, base_y,
+                             min_dist, min_dist_from_base, max_attempts=500, batch_size=64):
+    """
+    Tire n positions entières d'anomalies, l'une après l'autre, en respectant si possible :
+    - la distance minimale entre anomalies (min_dist)
+    - la distance minimale à la base (min_dist_from_base)
+    Les candidats sont tirés et testés par lots (premier candidat valide retenu).
+    Retourne un tableau (n, 2) de positions (x, y).
+    """
+    def random_positions(margin, n_candidates):
+        """Tableau (n_candidates, 2) de positions uniformes dans [margin, taille - margin] (bornes incluses)."""
+        return rng.integers(margin, [width - margin + 1, height - margin + 1], size=(n_candidates, 2))
+    
+    # Contraintes comparées au carré : pas de racine carrée
+    min_dist_sq = min_dist ** 2
+    min_dist_from_base_sq = min_dist_from_base ** 2
+    
+    def dist_sq_to_base(candidates):
+        """Distance au carré de chaque candidat à la base."""
+        return (candidates[:, 0] - base_x) ** 2 + (candidates[:, 1] - base_y) ** 2
+    
+    def nearest_dist_sq(candidates, existing_positions):
+        """Distance au carré de chaque candidat à l'anomalie existante la plus proche (inf si aucune)."""
+        if len(existing_positions) == 0:
+            return np.full(len(candidates), np.inf)
+        diff = candidates[:, np.newaxis, :] - existing_positions[np.newaxis, :, :]
+        return (diff * diff).sum(axis=2).min(axis=1).astype(np.float64)
+    
+    def sample_one(existing_positions):
+        """Position valide pour une nouvelle anomalie, compte tenu des positions déjà placées."""
+        attempts = 0
+        while attempts < max_attempts:
+            n_candidates = min(batch_size, max_attempts - attempts)
+            attempts += n_candidates
+            candidates = random_positions(5, n_candidates)
             
-            # Vérifier distance minimale entre anomalies
-            valid = True
-            for ex, ey in existing_positions:
-                if np.sqrt((x - ex)**2 + (y - ey)**2) < config.ANOMALY_MIN_DISTANCE:
-                    valid = False
-                    break
+            # Distance minimale de la base et entre anomalies
+            valid = ((dist_sq_to_base(candidates) >= min_dist_from_base_sq) &
+                     (nearest_dist_sq(candidates, existing_positions) >= min_dist_sq))
             
-            if valid:
-                return (x, y)
+            valid_indices = np.flatnonzero(valid)
+            if valid_indices.size:
+                return candidates[valid_indices[0]]
         
-        # Si impossible après 500 tentatives, chercher les points les plus éloignés
+        # Si impossible après max_attempts tentatives, chercher les points les plus éloignés
         # Génération dégradée : contraintes non satisfaites
         
         # Chercher le point le plus éloigné de toutes les anomalies existantes
-        best_pos = None
-        best_dist = 0
-        for _ in range(100):
-            x = random.randint(5, env.width - 5)
-            y = random.randint(5, env.height - 5)
-            
-            # Distance minimale à la base
-            if np.sqrt((x - base_x)**2 + (y - base_y)**2) < config.ANOMALY_MIN_DISTANCE_FROM_BASE:
-                continue
-            
-            # Distance minimale aux autres anomalies
-            min_dist_to_others = min(
-                [np.sqrt((x - ex)**2 + (y - ey)**2) for ex, ey in existing_positions],
-                default=float('inf')
-            )
-            
-            if min_dist_to_others > best_dist:
-                best_dist = min_dist_to_others
-                best_pos = (x, y)
-        
-        return best_pos if best_pos else (random.randint(20, env.width - 20), random.randint(20, env.height - 20))
-    
-    # Générer les anomalies avec types aléatoires selon la configuration
-    anomalies_to_create = []
-    for _ in range(config.NUM_ANOMALIES):
-        # Choisir aléatoirement un type parmi les types disponibles
-        anom_type = random.choice(config.ANOMALY_TYPES)
-        anomalies_to_create.append(anom_type)
-    
-    # Créer les anomalies avec positions valides
-    anomaly_positions = []
-    for anom_type in anomalies_to_create:
-        x, y = generate_anomaly_position(anomaly_positions, base_x, base_y)
-        anomaly_positions.append((x, y))
+        candidates = random_positions(5, 100)
+        nearest = nearest_dist_sq(candidates, existing_positions)
+        nearest[dist_sq_to_base(candidates) < min_dist_from_base_sq] = 0  # Trop près de la base : exclu
         
-        # Intensité: 50% chance d'être faible (1) ou forte (2)
-        intensity = random.choice([config.ANOMALY_WEAK_INTENSITY, config.ANOMALY_INTENSE_INTENSITY])
-        
-        # Radius selon le type
-        if anom_type == 'pluie_meteorites':
-            radius = random.uniform(6, 10)
-        elif anom_type == 'radiation':
-            radius = random.uniform(8, 10)
-        else:  # inondations
-            radius = random.uniform(8, 12)
-        
-        env.add_anomaly(Anomaly(x=x, y=y, intensity=intensity, radius=radius, type=anom_type))
+        best = int(np.argmax(nearest))  # Premier candidat le plus éloigné
+        if nearest[best] > 0:
+            return candidates[best]
+        return random_positions(20, 1)[0]
+    
+    positions = np.empty((n, 2), dtype=np.int64)
+    for i in range(n):
+        positions[i] = sample_one(positions[:i])
+    return positions
+
+# Plage de rayon (min, max) des anomalies générées, par type (types non listés : plage des inondations)
+ANOMALY_RADIUS_RANGES = {
+    'pluie_meteorites': (6, 10),
+    'radiation': (8, 10),
+    'inondations': (8, 12),
+}
+
+def create_test_environment():
+    """Crée un environnement de test avec plusieurs anomalies."""
+    # Un générateur par composant, tous dérivés de SEED (reproductible si SEED est défini)
+    base_rng, env_rng, rng = spawn_generators(config.SEED, 3)
+    
+    # Calculer la position de la base d'abord
+    base_x, base_y = get_base_position(config.MAP_WIDTH, config.MAP_HEIGHT, config.BASE_POSITION, base_rng)
+    
+    # L'environnement garde son générateur (terrain puis évolution des anomalies) ;
+    # index spatial des anomalies découpé selon le rayon de vision (rayon des requêtes des drones)
+    env = Environment(width=config.MAP_WIDTH, height=config.MAP_HEIGHT, base_x=base_x, base_y=base_y,
+                      rng=env_rng, grid_cell_size=config.VISION_RADIUS)
+    
+    # rng : générateur dédié au placement des anomalies
+    
+    # Tirages groupés pour toutes les anomalies (un appel au générateur par caractéristique)
+    num_anomalies = config.NUM_ANOMALIES
+    # Type aléatoire parmi les types disponibles
+    type_indices = rng.integers(len(config.ANOMALY_TYPES), size=num_anomalies).tolist()
+    # Intensité: 50% chance d'être faible (1) ou forte (2)
+    intensities = rng.choice(
+        [config.ANOMALY_WEAK_INTENSITY, config.ANOMALY_INTENSE_INTENSITY], size=num_anomalies
+    ).tolist()
+    # Tirage uniforme dans [0, 1), mis à l'échelle selon le type ci-dessous
+    radius_draws = rng.random(num_anomalies)
+    
+    # Positions valides pour toutes les anomalies
+    anomaly_positions = sample_anomaly_positions(
+        rng, num_anomalies, env.width, env.height, base_x, base_y,
+        config.ANOMALY_MIN_DISTANCE, config.ANOMALY_MIN_DISTANCE_FROM_BASE
+    ).tolist()
+    
+    # Radius selon le type, calculé pour toutes les anomalies à partir de la table des plages
+    radius_ranges = np.array([
+        ANOMALY_RADIUS_RANGES.get(anom_type, ANOMALY_RADIUS_RANGES['inondations'])
+        for anom_type in config.ANOMALY_TYPES
+    ]).reshape(-1, 2)
+    radius_min = radius_ranges[type_indices, 0]
+    radius_max = radius_ranges[type_indices, 1]
+    radii = (radius_min + (radius_max - radius_min) * radius_draws).tolist()
+    
+    # Créer les anomalies
+    for type_index, intensity, radius, (x, y) in zip(type_indices, intensities, radii, anomaly_positions):
+        env.add_anomaly(Anomaly(x=x, y=y, intensity=intensity, radius=radius, type=config.ANOMALY_TYPES[type_index]))
     
     return env, base_x, base_y
 
 
-def run_simulation():
+# Colonnes de l'export CSV des déplacements
+MOVEMENTS_CSV_HEADER = [
+    'drone_id', 'step', 'action',
+    'start_x', 'start_y', 'end_x', 'end_y',
+    'battery_after'
+]
+
+def write_new_movements(writer, drones, written_counts):
+    """
+    Écrit dans le CSV les événements ajoutés depuis le dernier appel (un seul writerows).
+    written_counts[i] : nombre d'événements du drone i déjà écrits (mis à jour ici).
+    """
+    rows = []
+    for i, d in enumerate(drones):
+        new_events = d.events[written_counts[i]:]
+        written_counts[i] += len(new_events)
+        rows.extend((d.id, *ev) for ev in new_events)  # Event : champs déjà dans l'ordre des colonnes
+    writer.writerows(rows)
+
+
+def apply_config_overrides(overrides):
+    """
+    Remplace des paramètres de config.py (dictionnaire {nom: valeur}).
+    Retourne les valeurs précédentes, à réappliquer pour restaurer la configuration.
+    Tous les noms sont vérifiés avant toute modification : un nom inconnu ne laisse rien appliqué.
+    """
+    overrides = overrides or {}
+    unknown = [name for name in overrides if not hasattr(config, name)]
+    if unknown:
+        raise ValueError(f"Paramètre de configuration inconnu : {', '.join(unknown)}")
+    previous = {name: getattr(config, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return previous
+
+def run_simulation(overrides=None):
     """
     Exécute la simulation complète du système de drones en utilisant la configuration.
+    
+    Args:
+        overrides: Paramètres de config.py à remplacer pour cette simulation uniquement
+                   (dictionnaire picklable, utilisable avec multiprocessing : voir sweep.py)
     """
+    previous = apply_config_overrides(overrides)
+    try:
+        return _run_configured_simulation()
+    finally:
+        apply_config_overrides(previous)  # Un processus réutilisé repart de config.py
+
+def _run_configured_simulation():
+    """Corps de run_simulation : lit les paramètres courants du module config."""
     print("\n" + "="*60)
     print("SIMULATION : SYSTÈME DE DRONES COOPÉRATIFS")
     print("="*60)
@@ -180,8 +279,7 @@ def run_simulation():
     print(f"  - Distance min anomalies : {config.ANOMALY_MIN_DISTANCE}")
     print("="*60 + "\n")
     
-    # 0. Fixer l'aléatoire si demandé
-    set_global_seed(config.SEED)
+    # 0. Aléatoire : générateurs dérivés de config.SEED, créés avec l'environnement (étape 2)
 
     # 1. Créer le détecteur d'anomalies
     detector = AnomalyDetector()
@@ -199,6 +297,7 @@ def run_simulation():
     
     # 3. Créer le centre de contrôle
     control = ControlCenter(base_x, base_y, env.width, env.height)
+    control.run_id = new_run_id()  # Nom commun des fichiers de résultats (CSV, PNG)
     
     # 4. Créer les drones avec les paramètres configurables
     drones = []
@@ -236,88 +335,128 @@ def run_simulation():
     max_steps = config.MAX_TURNS
     
     # Compteurs de statistiques
-    all_detected_positions = []  # Toutes les détections (avec doublons possibles)
+    all_detected_positions = set()  # Positions uniques de toutes les détections
     max_anomalies_seen = len(env.anomalies)  # Maximum d'anomalies présentes simultanément
     total_anomalies_created = len(env.anomalies)  # Total créées (init + propagation)
     
     # ========== TRACKERS POUR LES STATISTIQUES ==========
     all_robots_blocked_turn = None  # Tour à partir duquel TOUS les robots sont à la base inactifs
     
-    while True:
-        # Évolution des anomalies (AVEC propagation et snowball)
-        prev_count = len(env.anomalies)
-        for anomaly in env.anomalies:
-            anomaly.evolve(step, env)
-        
-        # Compter nouvelles anomalies créées par propagation
-        new_count = len(env.anomalies)
-        if new_count > prev_count:
-            total_anomalies_created += (new_count - prev_count)
-            max_anomalies_seen = max(max_anomalies_seen, new_count)
-        
-        # NE PAS supprimer les anomalies traitées : les laisser pour la visualisation
-        # Elles restent dans env.anomalies avec le flag treated = True
-        
-        # Nettoyage des anomalies traitées dans le centre de contrôle aussi
-        # Garder seulement les anomalies NON-traitées
-        remaining_positions = {(a.x, a.y) for a in env.anomalies if not getattr(a, 'treated', False)}
-        control.global_anomaly_map = {
-            pos: anom for pos, anom in control.global_anomaly_map.items()
-            if pos in remaining_positions
-        }
-        
-        # Mise à jour de chaque drone
-        for drone in drones:
-            drone.update(env, drones, step)
+    # ========== EXPORT CSV DES DÉPLACEMENTS (écrit au fil des tours) ==========
+    movements_file = None
+    if config.SAVE_MOVEMENTS_CSV:
+        os.makedirs('results', exist_ok=True)
+        movements_file = f"results/movements_{control.run_id}.csv"
+        movements_csv = open(movements_file, mode='w', newline='', encoding='utf-8')
+        movements_writer = csv.writer(movements_csv)
+        movements_writer.writerow(MOVEMENTS_CSV_HEADER)
+        movements_written = [0] * len(drones)  # Événements déjà écrits, par drone
+    
+    # Constantes lues à chaque tour : variables locales
+    verbose = config.VERBOSE
+    explored_total = env.explored_total
+    status_interval = config.STATUS_INTERVAL or max(50, max_steps // 100)  # Moins d'affichages sur les longues simulations
+    last_status_key = None  # État résumé lors du dernier affichage périodique
+    
+    # Boucle dans try/finally : le CSV est fermé (et vidé) même si la simulation s'interrompt
+    try:
+        while True:
+            # Évolution des anomalies (AVEC propagation et snowball)
+            prev_count = len(env.anomalies)
+            Anomaly.evolve_all(env, step)
             
-            # Enregistrer toutes les positions détectées
-            for anomaly_info in drone.detected_anomalies:
-                pos = anomaly_info.get('position')
-                if pos and pos not in all_detected_positions:
-                    all_detected_positions.append(pos)
+            # Compter nouvelles anomalies créées par propagation
+            new_count = len(env.anomalies)
+            if new_count > prev_count:
+                total_anomalies_created += (new_count - prev_count)
+                max_anomalies_seen = max(max_anomalies_seen, new_count)
             
-            # Transmission au centre de contrôle à CHAQUE TOUR (en temps réel)
-            control.receive_transmission(drone)
+            # NE PAS supprimer les anomalies traitées : les laisser pour la visualisation
+            # Elles restent dans env.anomalies avec le flag treated = True
             
-            # Réception des mises à jour (seulement à la base)
-            if drone.is_at_base:
-                control.send_update_to_drone(drone)
-        
-        # Affichage périodique
-        if step % 50 == 0:
-            control.analyze_interventions(env)
-            control.print_status(drones)
-            # progression affichée via print_status
-        
-        # Vérifier si TOUS les robots sont bloqués à la base (peu importe l'état de la mission)
-        # Un robot est bloqué s'il est à la base, avec la base pour cible, et pas d'anomalie à traiter
-        all_blocked = all(
-            drone.is_at_base and 
-            drone.target_x == drone.base_x and 
-            drone.target_y == drone.base_y and 
-            drone.target_anomaly is None
-            for drone in drones
-        )
-        if all_blocked and all_robots_blocked_turn is None:
-            all_robots_blocked_turn = step + 1  # Enregistrer le premier tour où TOUS sont bloqués
+            # Nettoyage des anomalies traitées dans le centre de contrôle aussi
+            # Garder seulement les anomalies NON-traitées (uniquement si un traitement ou
+            # une nouvelle entrée a eu lieu depuis le dernier nettoyage)
+            if env.anomalies_dirty or control.anomaly_map_dirty:
+                remaining_positions = set(env.untreated_positions())
+                control.global_anomaly_map = {
+                    pos: anom for pos, anom in control.global_anomaly_map.items()
+                    if pos in remaining_positions
+                }
+                env.anomalies_dirty = False
+                control.anomaly_map_dirty = False
+            
+            # Mise à jour de chaque drone
+            for drone in drones:
+                drone.update(env, drones, step)
+            
+                # Enregistrer toutes les positions détectées
+                for anomaly_info in drone.detected_anomalies:
+                    pos = anomaly_info.get('position')
+                    if pos:
+                        all_detected_positions.add(pos)  # Le set élimine les doublons
+            
+                # Transmission au centre de contrôle à CHAQUE TOUR (en temps réel)
+                control.receive_transmission(drone)
+            
+                # Réception des mises à jour (seulement à la base)
+                if drone.is_at_base:
+                    control.send_update_to_drone(drone)
+            
+            # Écriture des déplacements du tour
+            if movements_file is not None:
+                write_new_movements(movements_writer, drones, movements_written)
+            
+            # Affichage périodique (logs détaillés uniquement : évite l'analyse et les print à chaque palier)
+            # Un état identique au précédent (mêmes anomalies, positions arrondies des drones et
+            # exploration) n'est pas réaffiché
+            if verbose and step % status_interval == 0:
+                status_key = (
+                    env.anomaly_revision,
+                    len(control.global_anomaly_map),
+                    env.explored_count,
+                    tuple((round(drone.x), round(drone.y)) for drone in drones),
+                )
+                if status_key != last_status_key:
+                    last_status_key = status_key
+                    control.analyze_interventions(env)
+                    control.print_status(drones)
+                    sys.stdout.flush()  # progression affichée via print_status : visible pendant la simulation
+            
+            # Vérifier si TOUS les robots sont bloqués à la base (peu importe l'état de la mission)
+            # Un robot est bloqué s'il est à la base, avec la base pour cible, et pas d'anomalie à traiter
+            # Seul le premier tour compte : plus aucun test une fois enregistré
+            if all_robots_blocked_turn is None:
+                all_blocked = all(
+                    drone.is_at_base and 
+                    drone.target_x == drone.base_x and 
+                    drone.target_y == drone.base_y and 
+                    drone.target_anomaly is None
+                    for drone in drones
+                )
+                if all_blocked:
+                    all_robots_blocked_turn = step + 1  # Enregistrer le premier tour où TOUS sont bloqués
 
-        # Conditions d'arrêt
-        exploration_pct = (env.exploration_map.sum() / env.exploration_map.size) * 100
-        
-        # Compter anomalies NON-traitées
-        untreated_anomalies = sum(1 for a in env.anomalies if not getattr(a, 'treated', False))
-        
-        # Arrêt si 100% exploré ET plus d'anomalies NON-traitées
-        if exploration_pct >= 100.0 and untreated_anomalies == 0:
-            print(f"\nMission accomplie : Carte 100% explorée et toutes les anomalies traitées en {step+1} tours")
-            break
-        
-        # Arrêt si MAX_TURNS atteint
-        if step + 1 >= max_steps:
-            print(f"\nSimulation complète : {max_steps} tours atteints (exploration {exploration_pct:.1f}%, anomalies non-traitées: {untreated_anomalies})")
-            break
+            # Conditions d'arrêt (compteur de cases explorées tenu à jour par l'environnement)
+            exploration_pct = (env.explored_count / explored_total) * 100
+            
+            # Anomalies NON-traitées (compteur tenu à jour par l'environnement)
+            untreated_anomalies = env.untreated_count
+            
+            # Arrêt si 100% exploré ET plus d'anomalies NON-traitées
+            if exploration_pct >= 100.0 and untreated_anomalies == 0:
+                print(f"\nMission accomplie : Carte 100% explorée et toutes les anomalies traitées en {step+1} tours")
+                break
+            
+            # Arrêt si MAX_TURNS atteint
+            if step + 1 >= max_steps:
+                print(f"\nSimulation complète : {max_steps} tours atteints (exploration {exploration_pct:.1f}%, anomalies non-traitées: {untreated_anomalies})")
+                break
 
-        step += 1
+            step += 1
+    finally:
+        if movements_file is not None:
+            movements_csv.close()
     
     # 6. Rapport final
     print("\n" + "="*60)
@@ -330,7 +469,7 @@ def run_simulation():
     control.analyze_interventions(env)
     control.print_status(drones)
 
-    exploration_pct = (env.exploration_map.sum() / env.exploration_map.size) * 100
+    exploration_pct = (env.explored_count / env.explored_total) * 100
     steps_done = step + 1  # step est 0-indexé dans la boucle
     
     # Compter les détections avec doublons : pour chaque anomalie, combien de drones l'ont détectée directement
@@ -342,36 +481,44 @@ def run_simulation():
     total_detections_with_duplicates = sum(detected_by_drone.values())
     
     # Compter les anomalies traitées vs détectées par les robots
-    treated_anomalies = sum(1 for a in env.anomalies if getattr(a, 'treated', False))
+    treated_anomalies = len(env.anomalies) - env.untreated_count
     detected_anomalies = len(all_detected_positions)  # Anomalies détectées par les robots
     
     # Anomalies impossibles à traiter = parmi celles DÉTECTÉES par les robots, celles trop loin ET NON traitées
-    from math import hypot
-    impossible_anomalies = 0
-    impossible_list = []
+    # Candidates : détectées, encore présentes dans la carte globale et non traitées
+    pending_positions = []
+    pending_intensities = []
     for pos in all_detected_positions:
         anom_info = control.global_anomaly_map.get(pos)
         if anom_info:
             anom_obj = anom_info.get('anomaly')
-            if anom_obj:
-                # Ne compter que si l'anomalie n'a pas été traitée
-                if not getattr(anom_obj, 'treated', False):
-                    intensity = anom_obj.intensity
-                    treatment_cost = config.TREATMENT_COST_INTENSE if intensity == 2 else config.TREATMENT_COST_WEAK
-                    
-                    # Coût total avec batterie pleine pour aller traiter et revenir
-                    dist_to_anom = hypot(pos[0] - base_x, pos[1] - base_y)
-                    dist_anom_to_base = dist_to_anom  # Même distance pour revenir
-                    total_cost = (dist_to_anom + dist_anom_to_base) * config.MOVEMENT_COST + treatment_cost
-                    
-                    # Si coût total dépasse batterie max, c'est IMPOSSIBLE à traiter
-                    if total_cost > config.BATTERY_MAX:
-                        impossible_anomalies += 1
-                        impossible_list.append((pos, total_cost, intensity))
+            # Ne compter que si l'anomalie n'a pas été traitée
+            if anom_obj and not anom_obj.treated:
+                pending_positions.append(pos)
+                pending_intensities.append(anom_obj.intensity)
+    
+    impossible_anomalies = 0
+    impossible_list = []
+    if pending_positions:
+        positions = np.array(pending_positions, dtype=np.float64)
+        intensities = np.array(pending_intensities)
+        treatment_cost = np.where(intensities == 2, config.TREATMENT_COST_INTENSE, config.TREATMENT_COST_WEAK)
+        
+        # Coût total avec batterie pleine pour aller traiter et revenir (même distance aller et retour)
+        dist_to_anom = np.hypot(positions[:, 0] - base_x, positions[:, 1] - base_y)
+        total_cost = (dist_to_anom + dist_to_anom) * config.MOVEMENT_COST + treatment_cost
+        
+        # Si coût total dépasse batterie max, c'est IMPOSSIBLE à traiter
+        impossible_mask = total_cost > config.BATTERY_MAX
+        impossible_anomalies = int(np.count_nonzero(impossible_mask))
+        impossible_list = [
+            (pending_positions[i], float(total_cost[i]), pending_intensities[i])
+            for i in np.flatnonzero(impossible_mask)
+        ]
     
     print(f"\nSTATISTIQUES FINALES :")
     print(f"   - Zone explorée : {exploration_pct:.1f}%")
-    print(f"   - Anomalies restantes (non-traitées) : {sum(1 for a in env.anomalies if not getattr(a, 'treated', False))}")
+    print(f"   - Anomalies restantes (non-traitées) : {env.untreated_count}")
     print(f"   - Anomalies sur la map (créées) : {total_anomalies_created}")
     if all_robots_blocked_turn is not None:
         print(f"   - Robots bloqués à la base : à partir du tour {all_robots_blocked_turn}")
@@ -411,32 +558,13 @@ def run_simulation():
     control.steps_done = steps_done
     control.max_steps = max_steps
 
-    # Export des déplacements détaillés (selon configuration)
-    if config.SAVE_MOVEMENTS_CSV:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        os.makedirs('results', exist_ok=True)
-        movements_file = f"results/movements_{timestamp}.csv"
-        with open(movements_file, mode='w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                'drone_id', 'step', 'action',
-                'start_x', 'start_y', 'end_x', 'end_y',
-                'battery_after'
-            ])
-            for d in drones:
-                for ev in d.events:
-                    writer.writerow([
-                        d.id,
-                        ev.get('step'),
-                        ev.get('action'),
-                        ev.get('start_x'), ev.get('start_y'),
-                        ev.get('end_x'), ev.get('end_y'),
-                        ev.get('battery')
-                    ])
+    # Export des déplacements détaillés (écrit pendant la simulation, selon configuration)
+    if movements_file is not None:
         print(f"   - Déplacements exportés : {movements_file}")
     else:
         print(f"   - Déplacements : NON SAUVEGARDÉS (config SAVE_MOVEMENTS_CSV=False)")
     
+    sys.stdout.flush()  # Sortie standard mise en tampon (voir point d'entrée) : tout afficher en fin de simulation
     return env, drones, control, initial_anomalies
 
 
@@ -444,6 +572,14 @@ def run_simulation():
 # VISUALISATION (OPTIONNEL)
 # ------------------------------
 
+# Couleurs RGBA du terrain, indexées par type (0=plaine, 1=forêt, 2=rivière, 3=lac)
+TERRAIN_PALETTE = np.array([
+    [0.95, 0.90, 0.70, 1.0],  # Plaine : beige clair
+    [0.13, 0.55, 0.13, 1.0],  # Forêt : vert forêt
+    [0.25, 0.41, 0.88, 1.0],  # Rivière : bleu rivière
+    [0.00, 0.45, 0.70, 1.0],  # Lac : bleu lac
+], dtype=np.float32)
+
 def visualize_final_state(env, drones, control, initial_anomalies):
     """Crée une visualisation améliorée de l'état final de la simulation."""
     if not config.SAVE_VISUALIZATION:
@@ -460,18 +596,7 @@ def visualize_final_state(env, drones, control, initial_anomalies):
         ax.axhline(y=y, color='gray', linestyle='--', alpha=0.3, linewidth=0.5)
     
     # ========== FOND DE LA CARTE (Terrain) ==========
-    terrain_colors = np.zeros((env.height, env.width, 4))  # RGBA
-    for y in range(env.height):
-        for x in range(env.width):
-            terrain = env.terrain_map[y, x]
-            if terrain == 0:  # Plaine
-                terrain_colors[y, x] = [0.95, 0.90, 0.70, 1.0]  # Beige clair
-            elif terrain == 1:  # Forêt
-                terrain_colors[y, x] = [0.13, 0.55, 0.13, 1.0]  # Vert forêt
-            elif terrain == 2:  # Rivière
-                terrain_colors[y, x] = [0.25, 0.41, 0.88, 1.0]  # Bleu rivière
-            elif terrain == 3:  # Lac
-                terrain_colors[y, x] = [0.00, 0.45, 0.70, 1.0]  # Bleu lac
+    terrain_colors = TERRAIN_PALETTE[env.terrain_map]  # Image RGBA (hauteur, largeur, 4)
     
     ax.imshow(terrain_colors, origin='lower', extent=[0, env.width, 0, env.height])
     
@@ -493,59 +618,75 @@ def visualize_final_state(env, drones, control, initial_anomalies):
         'inondations': '#00CED1'         # Turquoise
     }
     
-    added_labels = set()
-    
-    
-    # Utiliser les anomalies initiales pour la visualisation (pas celles supprimées après traitement)
-    for anomaly in initial_anomalies:
-        symbol = anomaly_symbols.get(anomaly.type, 'o')
-        
-        # Vérifier si l'anomalie a été découverte
-        # Essayer plusieurs formes de clé pour matcher
-        anom_pos = (int(anomaly.x), int(anomaly.y))
-        anom_pos_round = (round(anomaly.x), round(anomaly.y))
-        is_discovered = (anom_pos in control.detected_anomaly_positions or 
-                        anom_pos_round in control.detected_anomaly_positions)
-        
-        # Couleur : grise si non découverte, sinon sa couleur propre
-        color = anomaly_colors_map.get(anomaly.type, '#FF0000')
-        display_color = color if is_discovered else '#AAAAAA'  # Gris clair si non découvert
-        
-        label = f'{anomaly.type.replace("_", " ").title()}' if anomaly.type not in added_labels else None
-        
-        # ========== SYMBOLE AVEC BORDURE NOIRE SEULEMENT SI TRAITÉE ==========
-        edge_width = 1.5 if anomaly.treated else 0  # Bordure fine seulement si traitée
-        ax.plot(anomaly.x, anomaly.y, symbol, 
-               color=display_color,
-               markersize=20, 
-               markeredgewidth=edge_width, 
-               markeredgecolor='black' if anomaly.treated else display_color, 
-               label=label)
-        
-        # ========== TEXTE INTENSITÉ (1 ou 2) ==========
-        intensity_text = str(anomaly.intensity)  # 1 ou 2
-        ax.text(anomaly.x, anomaly.y, intensity_text, 
+    # Utiliser les anomalies initiales pour la visualisation (pas celles supprimées après traitement) :
+    # ce sont les premières anomalies de l'environnement, lues directement dans ses tableaux
+    n_initial = len(initial_anomalies)
+    anomaly_x = env.anomaly_x[:n_initial]
+    anomaly_y = env.anomaly_y[:n_initial]
+    treated = env.anomaly_treated[:n_initial]
+    anomaly_types = np.array([anomaly.type for anomaly in initial_anomalies])
+    
+    # Vérifier si chaque anomalie a été découverte (position tronquée ou arrondie)
+    # via une grille des positions détectées plutôt qu'une recherche par anomalie
+    detected_grid = np.zeros((env.height + 1, env.width + 1), dtype=bool)
+    if control.detected_anomaly_positions:
+        detected = np.array(list(control.detected_anomaly_positions), dtype=np.intp)
+        detected_grid[detected[:, 1], detected[:, 0]] = True
+    is_discovered = (detected_grid[anomaly_y.astype(np.intp), anomaly_x.astype(np.intp)] |
+                     detected_grid[np.round(anomaly_y).astype(np.intp), np.round(anomaly_x).astype(np.intp)])
+    
+    # ========== TEXTE INTENSITÉ (1 ou 2) ==========
+    for x, y, intensity in zip(anomaly_x.tolist(), anomaly_y.tolist(),
+                               env.anomaly_intensity[:n_initial].tolist()):
+        ax.text(x, y, str(intensity), 
                fontsize=12, fontweight='bold', 
                ha='center', va='center',
                color='black')
-        
-        if anomaly.type not in added_labels and label:
-            added_labels.add(anomaly.type)
+    
+    # Regroupement par type (ordre de première apparition conservé pour la légende) :
+    # un seul scatter par type au lieu d'un ax.plot par anomalie
+    markers_by_type = {}
+    for anomaly_type in dict.fromkeys(anomaly_types.tolist()):
+        in_type = anomaly_types == anomaly_type
+        # Couleur : grise si non découverte, sinon sa couleur propre
+        color = anomaly_colors_map.get(anomaly_type, '#FF0000')
+        display_colors = np.where(is_discovered[in_type], color, '#AAAAAA')  # Gris clair si non découvert
+        type_treated = treated[in_type]
+        markers_by_type[anomaly_type] = {
+            'x': anomaly_x[in_type],
+            'y': anomaly_y[in_type],
+            'colors': display_colors.tolist(),
+            # Bordure noire fine seulement si traitée
+            'edge_colors': np.where(type_treated, 'black', display_colors).tolist(),
+            'edge_widths': np.where(type_treated, 1.5, 0),
+        }
+    
+    # ========== SYMBOLES (UN SCATTER PAR TYPE) ==========
+    for anomaly_type, group in markers_by_type.items():
+        ax.scatter(group['x'], group['y'],
+                   marker=anomaly_symbols.get(anomaly_type, 'o'),
+                   s=20 ** 2,  # Équivalent de markersize=20
+                   c=group['colors'],
+                   edgecolors=group['edge_colors'],
+                   linewidths=group['edge_widths'],
+                   zorder=2,  # Au-dessus du terrain, comme les marqueurs de ax.plot
+                   label=anomaly_type.replace("_", " ").title())
     
     # ========== TRAJECTOIRES DES DRONES ==========
     cmap = plt.get_cmap('rainbow')
     colors = cmap(np.linspace(0, 1, len(drones)))
     
     for drone, color in zip(drones, colors):
-        path = np.array(drone.path_history)
+        path = drone.path_history  # Vue (n, 2) float32, pas de conversion
+        n_points = len(path)
         
         # Tracer la trajectoire
         ax.plot(path[:, 0], path[:, 1], '-', color=color, alpha=0.6, 
                linewidth=1.5, label=f'Drone {drone.id} (trajet)')
 
         # Ajouter des flèches pour le sens du trajet
-        if len(path) > 1:
-            arrow_every = max(1, len(path) // 25)
+        if n_points > 1:
+            arrow_every = max(1, n_points // 25)
             seg_start = path[0:-1:arrow_every]
             seg_end = path[1::arrow_every]
             dx = seg_end[:, 0] - seg_start[:, 0]
@@ -561,8 +702,8 @@ def visualize_final_state(env, drones, control, initial_anomalies):
                markeredgewidth=2, markeredgecolor='black', label='_nolegend_')
         
         # Ajouter des points intermédiaires tous les N points
-        if len(path) > 10:
-            every_n = max(1, len(path) // 5)
+        if n_points > 10:
+            every_n = max(1, n_points // 5)
             ax.plot(path[::every_n, 0], path[::every_n, 1], '.', 
                    color=color, markersize=4, alpha=0.5, label='_nolegend_')
     
@@ -586,7 +727,7 @@ def visualize_final_state(env, drones, control, initial_anomalies):
     ax.grid(True, alpha=0.2, linestyle='-', linewidth=0.3)
     
     # Ajouter du texte d'information
-    info_text = f"Zone explorée: {(env.exploration_map.sum() / env.exploration_map.size) * 100:.1f}%\n"
+    info_text = f"Zone explorée: {(env.explored_count / env.explored_total) * 100:.1f}%\n"
     info_text += f"Anomalies détectées: {len(control.detected_anomaly_positions)}/{len(env.anomalies)}"
     if hasattr(control, 'steps_done') and hasattr(control, 'max_steps'):
         info_text += f"\nTours effectués: {control.steps_done}/{control.max_steps}"
@@ -599,17 +740,19 @@ def visualize_final_state(env, drones, control, initial_anomalies):
     
     plt.tight_layout()
     
-    # Génération d'un nom de fichier unique avec timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # Nom de fichier unique : même identifiant que le CSV de la simulation
+    run_id = control.run_id if hasattr(control, 'run_id') else new_run_id()
     
     # Créer le dossier 'results' s'il n'existe pas
     os.makedirs('results', exist_ok=True)
     
-    filename = f'results/simulation_{timestamp}.png'
+    filename = f'results/simulation_{run_id}.png'
     
     plt.savefig(filename, dpi=150, bbox_inches='tight')
     print(f"\nVisualisation sauvegardée : {filename}")
-    plt.show()
+    if config.SHOW_VISUALIZATION:
+        plt.show()
+    plt.close(fig)  # Libère la figure (utile quand plusieurs simulations s'enchaînent)
 
 
 # ------------------------------
@@ -617,6 +760,10 @@ def visualize_final_state(env, drones, control, initial_anomalies):
 # ------------------------------
 
 if __name__ == "__main__":
+    # Sortie en tampon (pas de vidage à chaque ligne) : les affichages ne ralentissent plus les longues simulations
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(line_buffering=False)
+    
     print("\n" + "="*60)
     print("   PROJET IA - SYSTÈME AUTONOME DE DRONES COOPÉRATIFS")
     print("   Surveillance d'Environnements Sensibles - 2025")
@@ -0,0 +1,64 @@
+import matplotlib
+matplotlib.use('Agg')  # Aucune fenêtre dans les processus de calcul
+
+import contextlib
+import io
+from itertools import product
+from multiprocessing import Pool
+
+import main
+
+#==============================================================================
+# BALAYAGE DE PARAMÈTRES
+# Lance plusieurs simulations indépendantes en parallèle (une par processus)
+#==============================================================================
+
+# Paramètres balayés (toutes les combinaisons sont simulées)
+SEEDS = range(10)
+STRATEGIES = ['action', 'exploration', 'mixte']
+
+
+def run_case(overrides):
+    """
+    Exécute une simulation avec les paramètres donnés et retourne un résumé picklable.
+    La sortie console de la simulation est ignorée.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        env, drones, control, initial_anomalies = main.run_simulation(overrides)
+    
+    return {
+        **overrides,
+        'tours': control.steps_done,
+        'exploration_pct': (env.explored_count / env.explored_total) * 100,
+        'anomalies_traitees': len(env.anomalies) - env.untreated_count,
+        'anomalies_total': len(env.anomalies),
+    }
+
+
+if __name__ == "__main__":
+    # Une configuration par combinaison (sans export de fichiers)
+    configs = [
+        {
+            'SEED': seed,
+            'ROBOT_STRATEGY': strategy,
+            'SAVE_MOVEMENTS_CSV': False,
+            'SAVE_VISUALIZATION': False,
+        }
+        for strategy, seed in product(STRATEGIES, SEEDS)
+    ]
+    
+    with Pool() as pool:
+        results = pool.map(run_case, configs)
+    
+    print(f"{'Stratégie':<12} {'Seed':>5} {'Tours':>6} {'Exploré':>9} {'Traitées':>9}")
+    for r in results:
+        print(f"{r['ROBOT_STRATEGY']:<12} {r['SEED']:>5} {r['tours']:>6} "
+              f"{r['exploration_pct']:>8.1f}% {r['anomalies_traitees']:>4}/{r['anomalies_total']:<4}")
+    
+    # Moyennes par stratégie
+    print("\nMoyennes par stratégie :")
+    for strategy in STRATEGIES:
+        runs = [r for r in results if r['ROBOT_STRATEGY'] == strategy]
+        mean_turns = sum(r['tours'] for r in runs) / len(runs)
+        mean_treated = sum(r['anomalies_traitees'] for r in runs) / len(runs)
+        print(f"  - {strategy} : {mean_turns:.1f} tours, {mean_treated:.1f} anomalies traitées")